@@ -0,0 +1,284 @@
+import os
+from yt_dlp.postprocessor import FFmpegMetadataPP, EmbedThumbnailPP
+from yt_dlp.postprocessor.ffmpeg import FFmpegPostProcessor, FFmpegPostProcessorError
+from yt_dlp.utils import variadic
+from job_control import JobCancelled
+from loudness import LoudnessAnalyzer, loudnorm_filter
+from replaygain import MEASURE_TARGET, gain_tags, write_tags
+
+# Códec -> (encoder de ffmpeg, extensión de salida)
+CODEC_TARGETS = {
+    "mp3": ("libmp3lame", "mp3"),
+    "aac": ("aac", "m4a"),
+    "opus": ("libopus", "opus"),
+    "flac": ("flac", "flac"),
+    "wav": ("pcm_s{}le", "wav"),
+    "alac": ("alac", "m4a"),
+}
+LOSSY_CODECS = ("mp3", "aac", "opus")
+# Códec de salida -> prefijos del acodec de yt-dlp cuyo flujo se puede copiar tal cual
+COPY_SOURCES = {
+    "mp3": ("mp3",),
+    "aac": ("mp4a",),
+    "opus": ("opus",),
+}
+LOSSLESS_CODECS = ("flac", "wav", "alac")
+
+# Preajustes de normalización: (I, LRA, TP)
+NORMALIZATION_PRESETS = {
+    "lufs_14": ("-14", "11", "-1.5"),
+    "lufs_23": ("-23", "7", "-2"),
+}
+COMPRESSOR_FILTER = 'acompressor=threshold=-21dB:ratio=9:attack=200:release=1000'
+CHANNEL_COUNTS = {"mono": "1", "multichannel": "6"}
+# Opciones de canales; "stereo" conserva los canales de la fuente (sin -ac)
+CHANNEL_MODES = ("stereo", *CHANNEL_COUNTS)
+
+
+def _sample_format_args(codec, bit_depth):
+    """Return the ffmpeg arguments that select the PCM sample format for a lossless codec."""
+    if codec == "wav":
+        return []  # La profundidad va implícita en el encoder pcm_sXXle
+    planar = "p" if codec == "alac" else ""
+    if bit_depth == "16":
+        return ['-sample_fmt', f's16{planar}']
+    args = ['-sample_fmt', f's32{planar}']
+    if bit_depth == "24":
+        args += ['-bits_per_raw_sample', '24']
+    return args
+
+
+class AudioPipeline:
+    """Every audio option of a job compiled into a single ffmpeg decode/filter/encode.
+
+    With normalization the encode is preceded by a loudness measurement of the
+    source (see LoudnessAnalyzer), and loudnorm then applies a linear gain. The
+    "replaygain" normalization leaves the audio alone and only adds gain tags
+    (see ReplayGainPP). Without filters, a source already in the target codec
+    is copied into the output container instead of being encoded again.
+    """
+
+    def __init__(self, codec, bitrate="192", bit_depth="16", sample_rate="44100", channels="stereo",
+                 normalization="off", custom_lufs=("-14", "11", "-1.5"), dynamic_compression=False):
+        self.codec = codec
+        encoder, self.extension = CODEC_TARGETS[codec]
+        self.encoder = encoder.format(bit_depth) if codec == "wav" else encoder
+
+        # Objetivo (I, LRA, TP) de loudnorm, o None sin normalización
+        self.loudness_target = None
+        self.gain_tags = normalization == "replaygain"
+        if normalization not in ("off", "replaygain"):
+            self.loudness_target = custom_lufs if normalization == "custom" else NORMALIZATION_PRESETS[normalization]
+        self.dynamic_compression = dynamic_compression
+        self.channels = channels
+        self.bitrate = bitrate
+
+        self.output_args = ['-c:a', self.encoder]
+        if codec in LOSSY_CODECS:
+            self.output_args += ['-b:a', f'{bitrate}k']
+            if self.loudness_target:
+                # loudnorm sobremuestrea a 192 kHz; volver a una frecuencia estándar
+                self.output_args += ['-ar', '48000']
+        if codec in LOSSLESS_CODECS:
+            self.output_args += _sample_format_args(codec, bit_depth)
+            self.output_args += ['-ar', sample_rate]
+        if channels in CHANNEL_COUNTS:
+            self.output_args += ['-ac', CHANNEL_COUNTS[channels]]
+
+    @property
+    def copy_sources(self):
+        """acodec prefixes whose stream can be copied, or () when the options require an encode."""
+        if self.loudness_target or self.dynamic_compression or self.channels in CHANNEL_COUNTS:
+            return ()
+        return COPY_SOURCES.get(self.codec, ())
+
+    def format_selector(self):
+        """yt-dlp format: the best audio already in the target codec if it can be copied, else the best audio.
+
+        Only streams at or below the chosen bitrate are copied, so copying never
+        makes a file larger than the user asked for.
+        """
+        return "/".join([*(f"bestaudio[acodec^={prefix}][abr<={self.bitrate}]" for prefix in self.copy_sources),
+                         "bestaudio/best"])
+
+    def can_copy(self, acodec, abr=None):
+        """Whether a downloaded stream with this acodec and bitrate (kbps) goes to the output without an encode."""
+        if not (self.copy_sources and acodec and abr) or not acodec.startswith(self.copy_sources):
+            return False
+        # Un flujo de más bitrate que el pedido se recodifica al bitrate elegido
+        return abr <= float(self.bitrate)
+
+    def copy_args(self):
+        return ['-map', '0:a:0', '-vn', '-c:a', 'copy']
+
+    def filter_graph(self, loudness=None):
+        """Filters of the encode; `loudness` is the measurement of the source, if there is one."""
+        filters = []
+        if self.loudness_target:
+            filters.append(loudnorm_filter(self.loudness_target, loudness))
+        if self.dynamic_compression:
+            filters.append(COMPRESSOR_FILTER)
+        return ','.join(filters)
+
+    def ffmpeg_args(self, loudness=None):
+        """Arguments placed between the input and the output file of the single encode."""
+        args = ['-map', '0:a:0', '-vn']
+        filter_graph = self.filter_graph(loudness)
+        if filter_graph:
+            args += ['-filter:a', filter_graph]
+        return args + self.output_args
+
+
+class AudioPipelinePP(FFmpegPostProcessor):
+    """Post-processor that runs an AudioPipeline: one decode and one encode per track."""
+
+    def __init__(self, downloader, pipeline, control, analyzer=None):
+        super().__init__(downloader)
+        self.pipeline = pipeline
+        self.control = control
+        self.analyzer = analyzer
+
+    def run(self, info):
+        if not self.available:
+            raise FFmpegPostProcessorError('ffmpeg not found. Please install or provide the path using --ffmpeg-location')
+        source = info['filepath']
+        prefix, _ = os.path.splitext(source)
+        output = f'{prefix}.{self.pipeline.extension}'
+        target = f'{prefix}.temp.{self.pipeline.extension}' if output == source else output
+
+        if self.pipeline.can_copy(info.get('acodec'), info.get('abr')):
+            # El flujo ya está en el códec de salida: solo se cambia de contenedor
+            info['audio_path'] = 'copy'
+            self.to_screen(f'Copying the {info["acodec"]} stream of "{source}" -> {self.pipeline.codec}')
+            args = self.pipeline.copy_args()
+        else:
+            loudness = None
+            if self.pipeline.loudness_target and self.analyzer:
+                key = (info['extractor_key'], info['id']) if info.get('extractor_key') and info.get('id') else None
+                self.to_screen(f'Measuring loudness of "{source}"')
+                loudness = self.analyzer.measure(self.executable, source, key, self.pipeline.loudness_target)
+            info['audio_path'] = 'transcode'
+            filter_graph = self.pipeline.filter_graph(loudness)
+            self.to_screen(f'Encoding "{source}" -> {self.pipeline.codec} [{filter_graph or "no filters"}]')
+            args = self.pipeline.ffmpeg_args(loudness)
+        cmd = [self.executable, '-y', '-nostdin', '-loglevel', 'error', '-i', source, *args, target]
+        try:
+            returncode, stderr = self.control.run_process(cmd)
+        except JobCancelled:
+            if os.path.exists(target):
+                os.remove(target)
+            raise
+        if returncode != 0:
+            if os.path.exists(target):
+                os.remove(target)
+            stderr = stderr.strip()
+            raise FFmpegPostProcessorError(stderr.splitlines()[-1] if stderr else f'ffmpeg exited with code {returncode}')
+
+        if target != output:
+            os.replace(target, output)
+            return [], info
+        info['filepath'] = output
+        info['ext'] = self.pipeline.extension
+        return [source], info
+
+
+class ReplayGainPP(FFmpegPostProcessor):
+    """Post-processor of the tag-only normalization: writes the track gain into the final file.
+
+    The final file itself is measured, since a downmix or a resample changes
+    its loudness; the measurement is cached under the settings hash of the
+    file, apart from the source's. The tags are written without re-encoding.
+    """
+
+    def __init__(self, downloader, control, analyzer, settings_hash=None):
+        super().__init__(downloader)
+        self.control = control
+        self.analyzer = analyzer
+        self.settings_hash = settings_hash
+
+    def run(self, info):
+        if not self.available:
+            raise FFmpegPostProcessorError('ffmpeg not found. Please install or provide the path using --ffmpeg-location')
+        path = info['filepath']
+        key = (info['extractor_key'], info['id']) if info.get('extractor_key') and info.get('id') else None
+        measured = self.analyzer.measure(self.executable, path, key if self.settings_hash else None, MEASURE_TARGET,
+                                         self.settings_hash)
+        if measured is None:
+            self.report_warning(f'No loudness measurement for "{path}"; it is left without gain tags')
+            return [], info
+        self.to_screen(f'Writing track gain to "{path}"')
+        try:
+            write_tags(self.control.run_process, self.executable, path,
+                       gain_tags(info.get('ext'), 'TRACK', measured['input_i'], measured['input_tp']))
+        except ValueError as e:
+            raise FFmpegPostProcessorError(str(e))
+        return [], info
+
+
+class ControlledFFmpegMixin:
+    """Runs the ffmpeg commands of a yt-dlp post-processor through JobControl.run_process."""
+
+    def __init__(self, downloader, control):
+        super().__init__(downloader)
+        self.control = control
+
+    def real_run_ffmpeg(self, input_path_opts, output_path_opts, *, expected_retcodes=(0,)):
+        # La misma línea de órdenes que FFmpegPostProcessor.real_run_ffmpeg de yt-dlp, pero el proceso
+        # se suspende, reanuda o mata con el trabajo
+        self.check_version()
+        oldest_mtime = min(os.stat(path).st_mtime for path, _ in input_path_opts if path)
+        cmd = [self.executable, '-y', '-nostdin']
+        if self.basename == 'ffmpeg':
+            cmd += ['-loglevel', 'repeat+info']
+        for name, path_opts in (('i', input_path_opts), ('o', output_path_opts)):
+            for number, (path, opts) in enumerate(path_opts, start=1):
+                if not path:
+                    continue
+                args = list(opts)
+                keys = [f'_{name}{number}', f'_{name}']
+                if name == 'o':
+                    args += ['-movflags', '+faststart']
+                    if number == 1:
+                        keys.append('')
+                args += self._configuration_args(self.basename, keys)
+                if name == 'i':
+                    args.append('-i')
+                cmd += [*args, self._ffmpeg_filename_argument(path)]
+        returncode, stderr = self.control.run_process(cmd)
+        if returncode not in variadic(expected_retcodes):
+            stderr = stderr.strip()
+            raise FFmpegPostProcessorError(stderr.splitlines()[-1] if stderr else f'ffmpeg exited with code {returncode}')
+        for out_path, _ in output_path_opts:
+            if out_path:
+                self.try_utime(out_path, oldest_mtime, oldest_mtime)
+        return stderr
+
+
+class ControlledMetadataPP(ControlledFFmpegMixin, FFmpegMetadataPP):
+    """FFmpegMetadataPP whose ffmpeg follows the pause and cancellation of the job."""
+
+
+class ControlledEmbedThumbnailPP(ControlledFFmpegMixin, EmbedThumbnailPP):
+    """EmbedThumbnailPP whose ffmpeg follows the pause and cancellation of the job."""
+
+
+def ffmpeg_executable():
+    """Path of the ffmpeg executable yt-dlp uses, or None if it is missing."""
+    return FFmpegPostProcessor().executable
+
+
+def add_audio_postprocessors(ydl, pipeline, metadata, control, library=None, settings_hash=None):
+    """Register the audio pipeline and, after it, the tagging steps on a YoutubeDL instance.
+
+    The library index, if given, keeps the loudness measurements of the tracks;
+    settings_hash identifies the files produced, for the measurements of the
+    tag-only normalization.
+    """
+    analyzer = LoudnessAnalyzer(control, library) if pipeline.loudness_target or pipeline.gain_tags else None
+    ydl.add_post_processor(AudioPipelinePP(ydl, pipeline, control, analyzer), when='post_process')
+    if metadata:
+        ydl.add_post_processor(ControlledMetadataPP(ydl, control), when='post_process')
+        ydl.add_post_processor(ControlledEmbedThumbnailPP(ydl, control), when='post_process')
+    if pipeline.gain_tags:
+        # Al final, para que ninguna reescritura posterior del archivo pierda las etiquetas
+        ydl.add_post_processor(ReplayGainPP(ydl, control, analyzer, settings_hash), when='post_process')
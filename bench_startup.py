@@ -0,0 +1,90 @@
+"""Startup benchmark: time from launching the interpreter until the main window is drawn.
+
+Each run starts a fresh Python process that builds the application the same
+way main.py does and reports when the first frame has been processed.
+
+    python bench_startup.py            # 5 cold and 5 warm launches
+    python bench_startup.py --runs 10
+
+Cold launches compile every module again (an empty bytecode cache per run);
+warm launches reuse the bytecode cache written by a previous launch. The OS
+file cache is not flushed, so "cold" measures a first launch after an update
+rather than the first launch after a reboot.
+
+Every launch gets an empty temporary configuration directory, so the user's
+config.json, library and job journal are neither read nor written, and the
+offer to resume an unfinished job is disabled.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = r"""
+import sys, time
+start = time.time()
+import tkinter as tk
+from downloader_app import DownloaderApp
+imported = time.time()
+DownloaderApp.offer_resume = lambda self: None  # Un diálogo modal bloquearía la medida
+root = tk.Tk()
+app = DownloaderApp(root)
+root.update()
+shown = time.time()
+print(f"{start} {imported} {shown} {int('yt_dlp' in sys.modules)}")
+root.destroy()
+"""
+
+
+def launch(pycache_prefix):
+    with tempfile.TemporaryDirectory() as config_dir:
+        # Configuración vacía y carpeta de música temporal: la aplicación no toca la del usuario
+        with open(os.path.join(config_dir, "config.json"), "w", encoding="utf-8") as f:
+            json.dump({"music_folder": os.path.join(config_dir, "Música")}, f)
+        env = dict(os.environ, PYTHONPYCACHEPREFIX=pycache_prefix, EASYTUNRMUSIC_CONFIG_DIR=config_dir)
+        spawned = time.time()
+        result = subprocess.run([sys.executable, "-c", CHILD], cwd=ROOT, env=env,
+                                capture_output=True, text=True, check=True)
+    start, imported, shown, yt_dlp_loaded = result.stdout.split()[-4:]
+    return {
+        "interpreter": float(start) - spawned,
+        "imports": float(imported) - float(start),
+        "window": float(shown) - spawned,
+        "yt_dlp": yt_dlp_loaded == "1",
+    }
+
+
+def report(label, runs):
+    print(f"{label} ({len(runs)} runs)")
+    for key in ("interpreter", "imports", "window"):
+        values = [run[key] * 1000 for run in runs]
+        print(f"  {key:<12} median {statistics.median(values):8.1f} ms   min {min(values):8.1f} ms   max {max(values):8.1f} ms")
+    if any(run["yt_dlp"] for run in runs):
+        print("  warning: yt_dlp was imported before the window appeared")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="launches of each kind (default 5)")
+    args = parser.parse_args()
+
+    cold = []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as cache:
+            cold.append(launch(cache))
+    with tempfile.TemporaryDirectory() as cache:
+        launch(cache)  # Escribe la caché de bytecode
+        warm = [launch(cache) for _ in range(args.runs)]
+
+    report("cold", cold)
+    report("warm", warm)
+
+
+if __name__ == "__main__":
+    main()
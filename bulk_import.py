@@ -0,0 +1,112 @@
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from library_index import track_key
+
+URL_PATTERN = re.compile(r'https?://[^\s,;"\'<>]+')
+# Extractores de listas: sus URLs no se aceptan en la pestaña de canciones
+PLAYLIST_IES = ('YoutubePlaylist', 'YoutubeTab')
+RESOLVE_WORKERS = 8
+# Canciones que se añaden a la lista de una vez
+BATCH_SIZE = 25
+RESOLVE_OPTS = {
+    'quiet': True,
+    'extract_flat': True,
+    'force_generic_extractor': False,
+}
+
+
+def parse_urls(text):
+    """URLs found in pasted text or in a txt, CSV or M3U file, in order. # lines (M3U tags, comments) are skipped."""
+    urls = []
+    for line in text.splitlines():
+        if line.lstrip().startswith('#'):
+            continue
+        urls.extend(URL_PATTERN.findall(line))
+    return urls
+
+
+def read_url_file(path):
+    with open(path, "r", encoding="utf-8-sig", errors="replace") as f:
+        return parse_urls(f.read())
+
+
+class ImportResult:
+    """Counters of a bulk import, filled while it runs."""
+
+    def __init__(self):
+        self.added = 0
+        self.duplicates = 0
+        self.playlists = 0
+        self.failed = []  # [(url, error)]
+
+
+class _PlaylistURL(Exception):
+    """A URL that only turned out to be a playlist once resolved."""
+
+
+def _is_playlist(url, key):
+    return (key is not None and key[0] in PLAYLIST_IES) or 'playlist?list=' in url
+
+
+def import_songs(urls, known_urls, on_batch, cache=None, workers=RESOLVE_WORKERS, batch_size=BATCH_SIZE):
+    """Resolve the title and author of many song URLs on a bounded pool.
+
+    Duplicates (of each other or of known_urls) and playlist URLs are rejected
+    before anything is fetched. Songs keep the order of `urls` and are handed to
+    on_batch([(url, title, author)]) in batches. Runs on the calling thread and
+    returns an ImportResult.
+    """
+    result = ImportResult()
+    seen = {track_key(url) or url for url in known_urls}
+    accepted = []
+    for url in urls:
+        key = track_key(url)
+        if _is_playlist(url, key):
+            result.playlists += 1
+        elif (key or url) in seen:
+            result.duplicates += 1
+        else:
+            seen.add(key or url)
+            accepted.append(url)
+
+    local = threading.local()
+    ydls = []
+
+    def resolve(url):
+        details = cache.get_details(url) if cache else None
+        if details and details.get('title'):
+            return url, details['title'], details.get('uploader') or 'Desconocido'
+        if not hasattr(local, 'ydl'):
+            import yt_dlp
+            local.ydl = yt_dlp.YoutubeDL(RESOLVE_OPTS)
+            ydls.append(local.ydl)
+        info = local.ydl.extract_info(url, download=False, process=False)
+        if 'entries' in info:
+            raise _PlaylistURL(url)
+        return url, info.get('title', 'Sin título'), info.get('uploader', info.get('channel', 'Desconocido'))
+
+    batch = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='import') as executor:
+        futures = [(url, executor.submit(resolve, url)) for url in accepted]
+        try:
+            for url, future in futures:
+                try:
+                    batch.append(future.result())
+                except _PlaylistURL:
+                    result.playlists += 1
+                except Exception as e:
+                    result.failed.append((url, str(e)))
+                if len(batch) >= batch_size:
+                    on_batch(batch)
+                    result.added += len(batch)
+                    batch = []
+            if batch:
+                on_batch(batch)
+                result.added += len(batch)
+        finally:
+            for _, future in futures:
+                future.cancel()
+    for ydl in ydls:
+        ydl.close()
+    return result
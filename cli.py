@@ -0,0 +1,190 @@
+"""Headless entry point: runs the download engine without tkinter or ttkbootstrap.
+
+Examples:
+    python cli.py https://www.youtube.com/watch?v=... --codec opus --bitrate 160
+    python cli.py --playlist https://www.youtube.com/playlist?list=... --sync
+    python cli.py --search "artist song" --search-count 5 --output ~/Music
+    python cli.py --urls-file urls.txt --config ~/.easytunrmusic/config.json
+
+Progress is printed to stdout as JSON lines ({"event": "progress" | "failed" |
+"done" | "error", ...}); logging goes to stderr. Exit codes: 0 everything was
+downloaded, 1 some tracks failed, 2 the job could not run (bad arguments, not
+a playlist, ...), 130 interrupted.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+from threading import Thread
+from utils import CONFIG_DIR
+from config_store import ConfigStore
+from job_settings import JobSettings
+from job_control import JobControl
+from library_index import LibraryIndex
+from download_engine import DownloadJob
+from audio_pipeline import CHANNEL_MODES
+from playlist_source import NotAPlaylistError
+from search_engine import SearchSession
+
+EXIT_OK = 0
+EXIT_FAILED_TRACKS = 1
+EXIT_ERROR = 2
+EXIT_INTERRUPTED = 130
+# Segundos entre dos líneas de progreso
+PROGRESS_INTERVAL = 1.0
+
+
+def emit(event, **fields):
+    print(json.dumps({"event": event, **fields}, ensure_ascii=False), flush=True)
+
+
+def read_urls(path):
+    """URLs of a text file, one per line; blank lines and # comments are ignored."""
+    with (sys.stdin if path == "-" else open(path, "r", encoding="utf-8")) as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def search_urls(query, count):
+    """URLs of the first `count` songs of a YouTube search, playlists skipped."""
+    session = SearchSession(query, page_size=count)
+    urls = []
+    try:
+        while len(urls) < count and not session.exhausted:
+            urls.extend(result['url'] for result in session.next_page() if not result['is_playlist'])
+    finally:
+        session.close()
+    return urls[:count]
+
+
+def parse_override(value):
+    key, sep, raw = value.partition("=")
+    if not sep or not key:
+        raise argparse.ArgumentTypeError(f"expected KEY=VALUE, got {value!r}")
+    return key.strip(), raw.strip()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Download music without the graphical interface.")
+    parser.add_argument("urls", nargs="*", help="song or playlist URLs")
+    parser.add_argument("--urls-file", action="append", default=[], metavar="FILE",
+                        help="read URLs from a file, one per line ('-' for stdin)")
+    parser.add_argument("--search", action="append", default=[], metavar="QUERY",
+                        help="download the first results of a search")
+    parser.add_argument("--search-count", type=int, default=1, metavar="N", help="results per search (default 1)")
+    parser.add_argument("--playlist", action="store_true", help="treat the URLs as playlists")
+    parser.add_argument("--config", default=os.path.join(CONFIG_DIR, "config.json"),
+                        help="config.json with the audio options (default: the one of the application)")
+    parser.add_argument("--library", default=os.path.join(CONFIG_DIR, "library.db"), help="library index database")
+    parser.add_argument("-o", "--output", dest="music_folder", help="destination folder")
+    parser.add_argument("--threads", help="parallel downloads ('auto' = adapt to throughput and errors)")
+    parser.add_argument("--threads-min", help="lowest number of parallel downloads with --threads auto")
+    parser.add_argument("--threads-max", help="highest number of parallel downloads with --threads auto")
+    parser.add_argument("--transcode-threads", help="parallel ffmpeg processes ('auto' = one per core)")
+    parser.add_argument("--codec", help="mp3, aac, opus, flac, wav or alac")
+    parser.add_argument("--bitrate", help="bitrate in kbps for lossy codecs")
+    parser.add_argument("--sample-rate", help="sample rate in Hz")
+    parser.add_argument("--channels", choices=CHANNEL_MODES,
+                        help=f"{', '.join(CHANNEL_MODES[:-1])} or {CHANNEL_MODES[-1]}")
+    parser.add_argument("--normalization", help="off, lufs_14, lufs_23, custom or replaygain (gain tags only)")
+    parser.add_argument("--sync", dest="playlist_sync", action="store_const", const=True,
+                        help="incremental playlist sync")
+    parser.add_argument("--set", dest="overrides", action="append", default=[], type=parse_override,
+                        metavar="KEY=VALUE", help="override any config.json option")
+    return parser
+
+
+def run_job(job, urls, is_playlist):
+    """Run the job on a worker thread and report its progress. Returns the exit code."""
+    outcome = {}
+
+    def target():
+        try:
+            job.run(urls, is_playlist)
+        except NotAPlaylistError as e:
+            outcome['error'] = f"not a playlist: {e}"
+        except Exception as e:
+            outcome['error'] = str(e)
+
+    thread = Thread(target=target, name="download-job")
+    thread.start()
+    try:
+        while thread.is_alive():
+            thread.join(PROGRESS_INTERVAL)
+            snapshot = job.progress.snapshot()
+            emit("progress", total=snapshot.total, closed=snapshot.closed, completed=snapshot.completed,
+                 percent=round(snapshot.global_percent, 1), active=len(snapshot.workers),
+                 transcoding=snapshot.transcoding, speed=round(snapshot.speed), slots=job.slots,
+                 failed=len(job.failed))
+    except KeyboardInterrupt:
+        job.cancel()
+        thread.join()
+        emit("done", cancelled=True, submitted=job.submitted, skipped=job.skipped, retried=job.retried,
+             failed=len(job.failed))
+        return EXIT_INTERRUPTED
+
+    for video_id, error in list(job.failed):
+        emit("failed", id=video_id, error=error)
+    for title, count in job.removed_entries.items():
+        emit("removed", playlist=title, count=count)
+    if 'error' in outcome:
+        emit("error", message=outcome['error'])
+        return EXIT_ERROR
+    emit("done", cancelled=False, submitted=job.submitted, skipped=job.skipped, retried=job.retried,
+         copied=job.copied, transcoded=job.transcoded, failed=len(job.failed))
+    return EXIT_FAILED_TRACKS if job.failed else EXIT_OK
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    try:
+        config = ConfigStore(args.config).load()
+        urls = list(args.urls)
+        for path in args.urls_file:
+            urls.extend(read_urls(path))
+    except (OSError, ValueError) as e:
+        emit("error", message=str(e))
+        return EXIT_ERROR
+    if args.search and args.playlist:
+        parser.error("--search cannot be combined with --playlist")
+
+    overrides = {key: getattr(args, key) for key in ("music_folder", "threads", "threads_min", "threads_max",
+                                                       "transcode_threads", "codec",
+                                                       "bitrate", "sample_rate", "channels", "normalization",
+                                                       "playlist_sync")}
+    overrides.update(args.overrides)
+    if not overrides["music_folder"] and not config.get("music_folder"):
+        overrides["music_folder"] = os.path.join(os.getcwd(), "Música")
+    try:
+        settings = JobSettings.from_config(config, **overrides)
+    except (TypeError, ValueError) as e:
+        parser.error(f"invalid option: {e}")
+    if settings.threads < 0:
+        parser.error("--threads must be at least 1 or 'auto'")
+    if settings.threads_min < 1 or settings.threads_max < settings.threads_min:
+        parser.error("--threads-min must be at least 1 and not above --threads-max")
+
+    try:
+        for query in args.search:
+            urls.extend(search_urls(query, args.search_count))
+    except Exception as e:
+        emit("error", message=f"search failed: {e}")
+        return EXIT_ERROR
+    if not urls:
+        parser.error("no URLs, files or searches given")
+
+    os.makedirs(settings.music_folder, exist_ok=True)
+    os.makedirs(os.path.dirname(os.path.abspath(args.library)), exist_ok=True)
+    library = LibraryIndex(args.library)
+    job = DownloadJob(settings, JobControl(), library)
+    try:
+        return run_job(job, urls, args.playlist)
+    finally:
+        library.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+import logging
+import threading
+import time
+from retry_policy import THROTTLED
+
+# Duración de cada intervalo de medida (segundos)
+ADJUST_INTERVAL = 10
+# Ranuras con las que empieza un trabajo en modo automático (dentro de los límites)
+INITIAL_SLOTS = 4
+# Proporción de intentos fallidos en un intervalo a partir de la cual se reduce la concurrencia
+MAX_ERROR_RATE = 0.2
+# Una ranura añadida se mantiene si el caudal crece al menos esta proporción
+MIN_GAIN = 1.05
+# Intervalos sin volver a probar una subida que no mejoró el caudal
+HOLD_INTERVALS = 3
+
+
+class AdaptiveConcurrency:
+    """Download slots that grow and shrink AIMD-style between `minimum` and `maximum`.
+
+    Every download holds a slot between acquire() and release(), and reports its
+    outcome with record(). After each ADJUST_INTERVAL the interval that just
+    ended is judged: an HTTP 429/403 or an error rate above MAX_ERROR_RATE halves
+    the slots; otherwise, if every slot was busy, one slot is added, and taken
+    back at the end of the next interval if it did not raise the throughput.
+    bytes_done() returns the bytes downloaded so far by the job.
+    """
+
+    def __init__(self, minimum, maximum, bytes_done, initial=INITIAL_SLOTS):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self._bytes_done = bytes_done
+        self._active = 0
+        self._cond = threading.Condition()
+        self._window_start = time.monotonic()
+        self._window_bytes = bytes_done()
+        self._successes = 0
+        self._errors = 0
+        self._throttled = 0
+        self._saturated = False  # Todas las ranuras estuvieron ocupadas en algún momento del intervalo
+        self._last_rate = None
+        self._probing = False  # El intervalo actual prueba una ranura recién añadida
+        self._hold = 0
+
+    def acquire(self, control):
+        """Wait for a free slot, honouring the pause and cancellation of the job."""
+        while True:
+            with self._cond:
+                if self._active < self.limit:
+                    self._active += 1
+                    if self._active >= self.limit:
+                        self._saturated = True
+                    return
+                self._cond.wait(0.2)
+            control.checkpoint()
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify()
+
+    def record(self, error_class=None):
+        """Count the outcome of a download: None when it succeeded, else its retry_policy error class."""
+        with self._cond:
+            if error_class is None:
+                self._successes += 1
+            else:
+                self._errors += 1
+                if error_class == THROTTLED:
+                    self._throttled += 1
+            self._adjust()
+
+    def _adjust(self):
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed < ADJUST_INTERVAL:
+            return
+        done = self._bytes_done()
+        rate = (done - self._window_bytes) / elapsed
+        attempts = self._successes + self._errors
+        previous = self.limit
+        if self._throttled or (attempts and self._errors / attempts > MAX_ERROR_RATE):
+            # Disminución multiplicativa: el servidor limita o la red falla
+            self.limit = max(self.minimum, self.limit // 2)
+            self._probing = False
+            self._hold = HOLD_INTERVALS
+        elif self._probing and self._last_rate and rate < self._last_rate * MIN_GAIN:
+            # La última ranura no aumentó el caudal
+            self.limit = max(self.minimum, self.limit - 1)
+            self._probing = False
+            self._hold = HOLD_INTERVALS
+        elif self._hold:
+            self._hold -= 1
+            self._probing = False
+        elif self._saturated and self.limit < self.maximum:
+            # Aumento aditivo
+            self.limit += 1
+            self._probing = True
+        else:
+            self._probing = False
+        if self.limit != previous:
+            logging.info(f"Download slots {previous} -> {self.limit} ({rate / 1024:.0f} KB/s, "
+                         f"{self._errors}/{attempts} errors, {self._throttled} throttled)")
+            self._cond.notify_all()
+        self._last_rate = rate
+        self._window_start = now
+        self._window_bytes = done
+        self._successes = self._errors = self._throttled = 0
+        self._saturated = self._active >= self.limit
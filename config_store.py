@@ -0,0 +1,83 @@
+import json
+import logging
+import os
+import tempfile
+
+# Espera tras el último cambio antes de escribir config.json
+SAVE_DELAY_MS = 500
+
+
+class ConfigStore:
+    """config.json with debounced, atomic writes.
+
+    Changes only mark the store dirty; with a Tk root the file is written
+    SAVE_DELAY_MS after the last change, and flush() writes it at once (e.g. on
+    exit). collect(), if given, returns the current values and is merged into
+    `data` right before writing. The file is replaced through a temporary file
+    in the same folder, and nothing is written when the content is unchanged.
+    """
+
+    def __init__(self, path, root=None, collect=None, delay_ms=SAVE_DELAY_MS):
+        self.path = path
+        self.data = {}
+        self._root = root
+        self._collect = collect
+        self._delay_ms = delay_ms
+        self._dirty = False
+        self._timer = None
+        self._saved = None  # Contenido del archivo tal como se leyó o escribió por última vez
+
+    def load(self):
+        """Read the file into `data` (left empty when missing or unreadable) and return it."""
+        self.data.clear()
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.data.update(json.load(f))
+                self._saved = self._serialize()
+        except Exception as e:
+            logging.error(f"Error loading config: {e}")
+        return self.data
+
+    def mark_dirty(self, *args):
+        """Schedule a write. Accepts and ignores the arguments of a Tk trace callback."""
+        self._dirty = True
+        if self._root is None:
+            return
+        if self._timer is not None:
+            self._root.after_cancel(self._timer)
+        self._timer = self._root.after(self._delay_ms, self.flush)
+
+    def flush(self):
+        """Write the pending changes now. Returns True if the file was written."""
+        if self._timer is not None:
+            self._root.after_cancel(self._timer)
+            self._timer = None
+        if not self._dirty:
+            return False
+        self._dirty = False
+        if self._collect:
+            self.data.update(self._collect())
+        content = self._serialize()
+        if content == self._saved:
+            return False
+        try:
+            folder = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(prefix=".config-", suffix=".tmp", dir=folder)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(content)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except Exception as e:
+            logging.error(f"Error saving config: {e}")
+            return False
+        self._saved = content
+        return True
+
+    def _serialize(self):
+        return json.dumps(self.data, indent=4, ensure_ascii=False)
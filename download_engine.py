@@ -0,0 +1,371 @@
+import os
+import logging
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils import clean_folder_name
+from ydl_pool import YoutubeDLPool
+from transcode_stage import TranscodeStage
+from job_control import JobCancelled
+from progress import ProgressAggregator
+from playlist_source import PlaylistMetadataCache, iter_playlists, entry_url, entry_track_key
+from library_index import track_key
+from playlist_sync import PlaylistSync
+from job_journal import JOB_RUNNING, JOB_FINISHED, JOB_CANCELLED, ITEM_QUEUED, ITEM_IN_FLIGHT, ITEM_COMPLETED, ITEM_FAILED
+from retry_policy import RetryScheduler, classify_error, retry_delay
+from concurrency import AdaptiveConcurrency
+from audio_pipeline import ffmpeg_executable
+from replaygain import write_album_gain
+
+# Pistas abiertas a la vez por cada hilo de descarga; el resto espera en el iterador de entradas
+SUBMIT_WINDOW_PER_WORKER = 4
+
+
+class Track:
+    """A track on its way through a job: where it comes from, where it goes and how often it was retried."""
+    __slots__ = ('url', 'key', 'output_template', 'extra_info', 'item_id', 'attempts', 'error_class')
+
+    def __init__(self, url, key, output_template, extra_info=None, item_id=None):
+        self.url = url
+        self.key = key
+        self.output_template = output_template
+        self.extra_info = extra_info
+        self.item_id = item_id  # Fila de job_items, con un JobJournal
+        self.attempts = 0  # Reintentos ya programados
+        self.error_class = None
+
+
+class DownloadJob:
+    """One download job, driven by the Tk application or the command line from a background thread."""
+
+    def __init__(self, settings, control, library, on_playlist=None, journal=None):
+        self.settings = settings
+        self.control = control
+        self.library = library
+        self.on_playlist = on_playlist  # Se llama con cada Playlist resuelta
+        self.journal = journal
+        self.job_id = None
+        self._interrupted = False
+        self.progress = ProgressAggregator()
+        self.failed = []  # [(video_id, error)]
+        self.failures = []  # Track que agotaron sus reintentos
+        self.submitted = 0
+        self.retried = 0
+        self.copied = 0  # Pistas cuyo flujo de audio se copió sin recodificar
+        self.transcoded = 0
+        self.skipped = 0
+        self.synced = False
+        self.removed_entries = {}  # título de la lista -> entradas que ya no están
+        self.album_folders = set()  # Carpetas de listas con pistas nuevas, para la ganancia de álbum
+        self._executor = None
+        self._transcoder = None
+        self._retries = None
+        self._concurrency = None  # Con threads = 0 (automático)
+        self._open_tracks = 0  # Pistas enviadas que aún no terminaron (incluidas las que esperan un reintento)
+        self._tracks_changed = threading.Condition()
+
+    def _playlist_template(self, playlist):
+        if self.on_playlist:
+            self.on_playlist(playlist)
+        title = playlist.title or "Lista de reproducción"
+        playlist_folder = os.path.join(self.settings.music_folder, clean_folder_name(title))
+        os.makedirs(playlist_folder, exist_ok=True)
+        return os.path.join(playlist_folder, '%(title)s.%(ext)s')
+
+    def run(self, urls, is_playlist):
+        """Run the job on the calling thread; errors resolving the sources are raised, track errors go to `failed`."""
+        if self.journal:
+            self.job_id = self.journal.start_job(self.settings, urls, is_playlist)
+        self._run(urls, is_playlist)
+
+    def resume(self, record):
+        """Continue an interrupted job of the journal (a JobRecord) where it stopped."""
+        self.job_id = record.id
+        self.journal.set_job_status(record.id, JOB_RUNNING)
+        pending = [Track(item.url, item.key, item.output_template, item.extra_info, item.id)
+                   for item in self.journal.pending_items(record.id)]
+        journaled = {item.url for item in self.journal.items(record.id)}
+        self._run(record.urls, record.is_playlist, pending, journaled, enumerate_sources=not record.enumerated)
+
+    def retry_failed(self, failures):
+        """Run again only the tracks another job gave up on (its `failures`), with this job's settings."""
+        tracks = [Track(f.url, f.key, f.output_template, f.extra_info) for f in failures]
+        if self.journal:
+            self.job_id = self.journal.start_job(self.settings, [track.url for track in tracks], False)
+            self.journal.mark_enumerated(self.job_id)
+        self._run([], False, tracks, enumerate_sources=False)
+
+    def _sources(self, urls, is_playlist, sync, playlists, pending, journaled, enumerate_sources):
+        """Every Track to process: the pending ones first, then the ones listed from the sources."""
+        yield from pending
+        if not enumerate_sources:
+            return
+        if is_playlist:
+            entries = ((entry_url(entry), entry_track_key(entry), output_template, playlist.track_info(index))
+                       for playlist, index, entry, output_template in iter_playlists(playlists, urls, self._playlist_template,
+                                                                                      sync.select if sync else None))
+        else:
+            output_template = os.path.join(self.settings.music_folder, '%(title)s.%(ext)s')
+            entries = ((url, track_key(url), output_template, None) for url in urls)
+        try:
+            for url, key, output_template, extra_info in entries:
+                if url not in journaled:
+                    yield Track(url, key, output_template, extra_info)
+        finally:
+            entries.close()
+        if self.journal and not self.control.cancelled:
+            self.journal.mark_enumerated(self.job_id)
+
+    def _run(self, urls, is_playlist, pending=(), journaled=frozenset(), enumerate_sources=True):
+        settings = self.settings
+        playlists = PlaylistMetadataCache()
+        sync = PlaylistSync(self.library, settings.sync_flag_removed) if is_playlist and settings.playlist_sync else None
+        self.synced = sync is not None
+        items = self._sources(urls, is_playlist, sync, playlists, pending, journaled, enumerate_sources)
+
+        pool = YoutubeDLPool(settings, self.control, [self.progress.hook])
+        self._transcoder = TranscodeStage(settings, self.control, settings.transcode_threads, library=self.library)
+        if settings.threads:
+            workers = settings.threads
+        else:
+            # Modo automático: hay hilos para el máximo, pero solo descargan los que tienen ranura
+            self._concurrency = AdaptiveConcurrency(settings.threads_min, settings.threads_max,
+                                                    lambda: self.progress.snapshot().downloaded_bytes)
+            workers = self._concurrency.maximum
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._retries = RetryScheduler()
+        window = workers * SUBMIT_WINDOW_PER_WORKER
+        try:
+            # Las entradas se leen a medida que se liberan sitios en la ventana: en una lista enorme
+            # solo hay `window` pistas en memoria y las páginas se piden al ritmo de las descargas
+            for track in items:
+                if self.control.cancelled:
+                    break
+                # Las pistas ya presentes en su carpeta con las mismas opciones no se vuelven a descargar
+                if self._in_library(track):
+                    if track.extra_info:
+                        self.library.record_playlist_entry(track.extra_info['playlist_webpage_url'], track.key)
+                    if track.item_id is not None:
+                        self.journal.set_item_status(track.item_id, ITEM_COMPLETED)
+                    self.skipped += 1
+                    continue
+                if not self._wait_for_room(window):
+                    break
+                if self.journal and track.item_id is None:
+                    track.item_id = self.journal.add_item(self.job_id, track.url, track.key, track.output_template,
+                                                          track.extra_info)
+                # Bajo el mismo bloqueo que cancel(): no se envía nada a un pool ya cerrado
+                with self._tracks_changed:
+                    if self.control.cancelled:
+                        break
+                    self._open_tracks += 1
+                    self._executor.submit(self._download_video, pool, track)
+                self.submitted += 1
+                self.progress.total += 1
+            if sync:
+                self.removed_entries = dict(sync.removed)
+            pipeline = settings.audio_pipeline
+            # La ganancia de álbum se escribe antes de dar el trabajo por terminado, para que sus errores se vean
+            self.progress.finalizing = bool(pipeline and pipeline.gain_tags)
+            self.progress.close()
+            if self.skipped:
+                logging.info(f"Skipped {self.skipped} tracks already in the library")
+            # Las pistas que esperan un reintento siguen abiertas: el trabajo acaba cuando termina la última
+            with self._tracks_changed:
+                while self._open_tracks and not self.control.cancelled:
+                    self._tracks_changed.wait()
+            if self.progress.finalizing and self.album_folders and not self.control.cancelled:
+                self._write_album_gains()
+        except BaseException:
+            self.control.cancel()
+            raise
+        finally:
+            items.close()
+            self._retries.cancel()
+            self._executor.shutdown(wait=False)
+            # Esperar a las conversiones pendientes antes de cerrar los pools
+            self._transcoder.close()
+            pool.close()
+            playlists.close()
+            self.progress.finalizing = False
+            if self.journal and not self._interrupted:
+                # Un trabajo que falla al enumerar queda como cancelado; solo uno interrumpido sigue en curso
+                self.journal.set_job_status(self.job_id, JOB_CANCELLED if self.control.cancelled else JOB_FINISHED)
+
+    def _in_library(self, track):
+        """Whether the track already has a file in its folder; one from another folder is copied if untagged."""
+        folder = os.path.dirname(track.output_template)
+        path = self.library.lookup(track.key, self.settings.output_hash, folder)
+        if path is None:
+            return False
+        if os.path.dirname(os.path.normpath(path)) == os.path.normpath(folder):
+            return True
+        if track.extra_info and self.settings.metadata:
+            return False
+        target = os.path.join(folder, os.path.basename(path))
+        try:
+            if not os.path.exists(target):
+                # Copia y no enlace: las etiquetas de ganancia de álbum de cada carpeta se escriben en su archivo
+                shutil.copy2(path, target)
+        except OSError as e:
+            logging.warning(f"Could not copy {path} to {folder}: {e}")
+            return False
+        self.library.record_copy(track.key, path, target)
+        if track.extra_info:
+            self.album_folders.add(folder)
+        logging.info(f"Copied {path} to {folder}")
+        return True
+
+    def _write_album_gains(self):
+        """Write the album gain of every playlist folder the job added tracks to; failures go to `failed`."""
+        ffmpeg = ffmpeg_executable()
+        if not ffmpeg:
+            return
+        for folder in sorted(self.album_folders):
+            tracks = self.library.folder_loudness(folder)
+            try:
+                errors = write_album_gain(self.control.run_process, ffmpeg, tracks, self._transcoder.executor.map)
+            except JobCancelled:
+                return
+            self.failed.extend((os.path.basename(path), f"album gain: {error}") for path, error in errors)
+            logging.info(f"Album gain written to {len(tracks) - len(errors)} of {len(tracks)} tracks in {folder}")
+
+    def _wait_for_room(self, window):
+        """Block until fewer than `window` tracks are open. Returns False if the job was cancelled meanwhile."""
+        with self._tracks_changed:
+            while self._open_tracks >= window and not self.control.cancelled:
+                self._tracks_changed.wait()
+        return not self.control.cancelled
+
+    @property
+    def slots(self):
+        """Number of tracks allowed to download at the same time right now."""
+        return self._concurrency.limit if self._concurrency else self.settings.threads
+
+    def cancel(self):
+        """Stop the job: abort the running tracks and drop the queued ones."""
+        self.control.cancel()
+        if self._retries:
+            self._retries.cancel()
+        with self._tracks_changed:
+            self._tracks_changed.notify_all()
+            if self._executor:
+                # Los trabajos en cola se descartan; los activos abortan en su siguiente checkpoint
+                self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._transcoder:
+            self._transcoder.cancel()
+
+    def interrupt(self):
+        """Stop the job like cancel(), but leave it in the journal as running so it can be resumed."""
+        self._interrupted = True
+        self.cancel()
+
+    def _close_track(self):
+        """A track left the job, finished or given up on."""
+        self.progress.track_done()
+        with self._tracks_changed:
+            self._open_tracks -= 1
+            self._tracks_changed.notify_all()
+
+    def _track_failed(self, pool, track, error):
+        """Schedule another attempt of a failed track, or record the failure once its error class gives up."""
+        track.error_class = classify_error(error)
+        delay = retry_delay(track.error_class, track.attempts)
+        if delay is None:
+            video_id = track.url.split('v=')[-1] if 'v=' in track.url else 'Desconocido'
+            self.failed.append((video_id, str(error)))
+            self.failures.append(track)
+            if track.item_id is not None:
+                self.journal.set_item_status(track.item_id, ITEM_FAILED, str(error))
+            self._close_track()
+            return
+        track.attempts += 1
+        with self._tracks_changed:
+            self.retried += 1
+        logging.info(f"Retrying {track.url} in {delay:.0f}s ({track.error_class}, attempt {track.attempts}): {error}")
+        if track.item_id is not None:
+            self.journal.set_item_status(track.item_id, ITEM_QUEUED, str(error))
+        # El trabajador queda libre; la pista vuelve al pool cuando vence la espera
+        self._retries.schedule(delay, self._resubmit, pool, track)
+
+    def _resubmit(self, pool, track):
+        with self._tracks_changed:
+            if not self.control.cancelled:
+                self._executor.submit(self._download_video, pool, track)
+
+    def _finish_track(self, info, track):
+        self.library.record(info, self.settings.output_hash)
+        audio_path = info.get('audio_path')
+        if audio_path:
+            with self._tracks_changed:
+                if audio_path == 'copy':
+                    self.copied += 1
+                else:
+                    self.transcoded += 1
+            logging.info(f"{'Copied' if audio_path == 'copy' else 'Transcoded'} {info.get('title') or track.url}")
+        if track.extra_info:
+            self.library.record_playlist_entry(track.extra_info['playlist_webpage_url'], track.key)
+            self.album_folders.add(os.path.dirname(track.output_template))
+        if track.item_id is not None:
+            self.journal.set_item_status(track.item_id, ITEM_COMPLETED)
+
+    def _download_video(self, pool, track):
+        """Download stage: fetch one track and hand it to the transcode stage."""
+        concurrency = self._concurrency
+        try:
+            self.control.checkpoint()
+            if concurrency:
+                concurrency.acquire(self.control)
+        except JobCancelled:
+            return
+        self.progress.track_started()
+        info = None
+        try:
+            if track.item_id is not None:
+                self.journal.set_item_status(track.item_id, ITEM_IN_FLIGHT)
+            info = pool.get(track.output_template).extract_info(track.url, extra_info=track.extra_info)
+            if concurrency:
+                concurrency.record()
+        except Exception as e:
+            # Con el trabajo cancelado, el error es el aborto provocado por JobControl
+            if not self.control.cancelled:
+                self._track_failed(pool, track, e)
+                if concurrency:
+                    concurrency.record(track.error_class)
+                return
+        finally:
+            self.progress.download_finished()
+            if concurrency:
+                concurrency.release()
+        if not info:
+            if not self.control.cancelled:
+                self._close_track()
+            return
+
+        downloaded = info['requested_downloads'][-1] if info.get('requested_downloads') else info
+        try:
+            if self.settings.audio_pipeline:
+                self._transcoder.submit(self._transcode_video, pool, track, downloaded)
+                return  # _transcode_video cierra la pista
+            self._finish_track(downloaded, track)
+        except JobCancelled:
+            return
+        except Exception as e:
+            self._track_failed(pool, track, e)
+            return
+        self._close_track()
+
+    def _transcode_video(self, pool, track, info):
+        """Transcode stage: run the audio pipeline and tagging on a downloaded track."""
+        self.progress.transcode_started()
+        try:
+            info = self._transcoder.post_process(info, track.output_template)
+            self._finish_track(info, track)
+        except Exception as e:
+            if not self.control.cancelled:
+                # Un reintento vuelve a la etapa de descarga; yt-dlp reutiliza el archivo ya descargado
+                self._track_failed(pool, track, e)
+            return
+        finally:
+            self.progress.transcode_finished()
+        self._close_track()
@@ -1,198 +1,95 @@
-import os
 import re
-import yt_dlp
 from threading import Thread
-from concurrent.futures import ThreadPoolExecutor
 from translations import TRANSLATIONS
-from utils import clean_folder_name
-
-def download_video(app, video_url, output_template):
-    if app.is_cancelled:
-        return
-    while app.is_paused:
-        if app.is_cancelled:
-            return
-        import time
-        time.sleep(0.1)
-    try:
-        ydl_opts = {
-            'format': 'bestaudio/best',
-            'outtmpl': output_template,
-            'progress_delta': 0.01,
-            'quiet': True,
-            'progress_hooks': [lambda d: video_progress_hook(app, d)],
-        }
-        if app.extract_audio_var.get():
-            postprocessors = [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': app.codec_var.get(),
-            }]
-            if app.codec_var.get() in ["mp3", "aac", "opus"]:
-                postprocessors[0]['preferredquality'] = app.bitrate_var.get()
-            if app.metadata_var.get():
-                postprocessors.append({'key': 'FFmpegMetadata'})
-                postprocessors.append({'key': 'EmbedThumbnail'})
-                ydl_opts['writethumbnail'] = True
-            if app.extract_thumbnail_var.get():
-                ydl_opts['writethumbnail'] = True
-            if app.normalization_var.get() != "off":
-                if app.normalization_var.get() == "custom":
-                    norm_args = ['-filter:a', f'loudnorm=I={app.custom_lufs_i_var.get()}:LRA={app.custom_lufs_lra_var.get()}:TP={app.custom_lufs_tp_var.get()}']
-                else:
-                    norm_args = ['-filter:a', 'loudnorm=I=-14:TP=-1.5:LRA=11'] if app.normalization_var.get() == "lufs_14" else \
-                                ['-filter:a', 'loudnorm=I=-23:TP=-2:LRA=7']
-                postprocessors.append({'key': 'FFmpegPostProcessor', 'args': norm_args})
-            if app.dynamic_compression_var.get():
-                postprocessors.append({'key': 'FFmpegPostProcessor', 'args': ['-filter:a', 'acompressor=threshold=-21dB:ratio=9:attack=200:release=1000']})
-            if app.codec_var.get() in ["flac", "wav", "alac"]:
-                postprocessors.append({
-                    'key': 'FFmpegPostProcessor',
-                    'args': [f'-sample_fmt', f's{app.bit_depth_var.get()}', f'-ar', app.sample_rate_var.get()]
-                })
-            if app.channels_var.get() == "mono":
-                postprocessors.append({'key': 'FFmpegPostProcessor', 'args': ['-ac', '1']})
-            elif app.channels_var.get() == "multichannel":
-                postprocessors.append({'key': 'FFmpegPostProcessor', 'args': ['-ac', '6']})
-            ydl_opts['postprocessors'] = postprocessors
-        if app.keep_original_var.get():
-            ydl_opts['keepvideo'] = True
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([video_url])
-    except Exception as e:
-        video_id = video_url.split('v=')[-1] if 'v=' in video_url else 'Desconocido'
-        app.failed_videos.append((video_id, str(e)))
-    finally:
-        app.download_queue.put(1)
+from job_settings import JobSettings
+from job_control import JobControl
+from progress import FRAME_INTERVAL_MS, format_speed
+
+def new_job(app, settings=None):
+    """Snapshot the settings on the Tk thread and create the job the download thread will run."""
+    from download_engine import DownloadJob  # El motor importa yt_dlp; no se carga hasta la primera descarga
+    app.control = JobControl()
+    app.job = DownloadJob(settings or JobSettings.from_app(app), app.control, app.library, journal=app.journal)
+    app.progress = app.job.progress
+    app.failed_videos = app.job.failed
+    return app.job
+
+
+def start_job(app, *args):
+    """Run download(app, *args) on the job thread, kept in app.job_thread so closing the window can wait for it."""
+    app.job_thread = Thread(target=download, args=(app, *args))
+    app.job_thread.start()
+
+
+def update_progress(app, texts):
+    """Draw one progress frame from the aggregator. Runs on the Tk thread at FRAME_INTERVAL_MS."""
+    if app.is_cancelled or app.progress.finished:
+        return  # La ventana de progreso ya se cerró o se va a cerrar
+    snapshot = app.progress.snapshot()
+    if snapshot.closed and snapshot.total == 0:
+        return  # El hilo de descarga informa de que no hay nada que descargar
+    app.total_videos = snapshot.total
+    app.completed_videos = snapshot.completed
+    app.video_progress_var.set(snapshot.video_percent)
+    app.global_progress_var.set(snapshot.global_percent)
+    done = snapshot.closed and snapshot.completed >= snapshot.total
+    if done and snapshot.finalizing:
+        status = texts['album_gain']
+    elif snapshot.total > 1 or not snapshot.closed:
+        total = snapshot.total if snapshot.closed else f"{snapshot.total}+"
+        status = texts['multiple'].format(snapshot.completed, total)
+    else:
+        status = f"{texts['single']} {snapshot.video_percent:.1f}%"
+    app.progress_status_label.config(text=f"{texts['prefix']}: {status}")
+    workers = "  ".join(f"#{index} {percent:.0f}%" for index, percent in snapshot.workers)
+    if workers:
+        workers = f"{workers}  ·  {format_speed(snapshot.speed)}"
+    if snapshot.transcoding:
+        workers = f"{workers}  ·  ffmpeg: {snapshot.transcoding}" if workers else f"ffmpeg: {snapshot.transcoding}"
+    app.progress_workers_label.config(text=workers)
+    if done and not snapshot.finalizing:
+        app.finalize_download()
+    else:
+        app.root.after(FRAME_INTERVAL_MS, lambda: update_progress(app, texts))
 
-def video_progress_hook(app, d):
-    if app.is_cancelled:
-        return
-    if d['status'] == 'downloading':
-        percent_str = d.get('_percent_str', '0%').strip('%').replace(' ', '')
-        try:
-            percent = float(percent_str)
-            app.root.after(0, lambda: app.video_progress_var.set(percent))
-            if app.total_videos > 1:
-                app.root.after(0, lambda: app.global_progress_var.set((app.completed_videos + percent / 100) / app.total_videos * 100))
-            else:
-                app.root.after(0, lambda: app.global_progress_var.set(percent))
-                app.root.after(0, lambda: app.progress_status_label.config(
-                    text=f"{TRANSLATIONS[app.language_var.get()]['progress_status'].split(':')[0]}: Descargando... {percent:.1f}%"))
-        except ValueError:
-            pass
-    elif d['status'] == 'finished':
-        app.root.after(0, lambda: app.video_progress_var.set(100.0))
-        if app.total_videos <= 1:
-            app.root.after(0, lambda: app.global_progress_var.set(100.0))
+def download(app, job, urls, is_playlist, record=None, failures=None):
+    from playlist_source import NotAPlaylistError
+    lang = TRANSLATIONS[job.settings.language]
 
-def update_progress(app):
-    while not app.download_queue.empty():
-        app.download_queue.get()
-        app.completed_videos += 1
-        if app.total_videos > 0:
-            progress = (app.completed_videos / app.total_videos) * 100
-            app.root.after(0, lambda: app.global_progress_var.set(progress))
-            app.root.after(0, lambda: app.progress_status_label.config(
-                text=f"{TRANSLATIONS[app.language_var.get()]['progress_status'].split(':')[0]}: Descargando {app.completed_videos} de {app.total_videos} videos..."
-            ))
-    if app.completed_videos < app.total_videos and not app.is_cancelled:
-        app.root.after(100, lambda: update_progress(app))
-    elif app.completed_videos == app.total_videos or app.is_cancelled:
-        app.finalize_download()
+    def finish(error_message):
+        # Detener los fotogramas antes de que finalize_download destruya la ventana de progreso
+        job.progress.finish()
+        app.root.after(0, lambda: app.finalize_download(error_message=error_message))
 
-def download(app, urls, is_playlist):
     try:
-        video_urls = []
-        app.is_playlist = is_playlist
-
-        ydl_opts_info = {
-            'quiet': True,
-            'noplaylist': False,
-            'extract_flat': True,
+        texts = {
+            'prefix': lang['progress_status'].split(':')[0],
+            'single': lang['status_downloading'],
+            'multiple': lang['status_downloading_multiple'],
+            'album_gain': lang['status_album_gain'],
         }
-        if is_playlist:
-            for url in urls:
-                with yt_dlp.YoutubeDL(ydl_opts_info) as ydl:
-                    info = ydl.extract_info(url, download=False)
-                    if 'entries' in info and len(info['entries']) > 0:
-                        video_urls.extend([entry['url'] for entry in info['entries'] if entry.get('url')])
-                    else:
-                        app.finalize_download(error_message=TRANSLATIONS[app.language_var.get()]['error_not_playlist'])
-                        return
+        app.root.after(0, lambda: app.create_progress_window(is_playlist or len(urls) > 1))
+        app.root.after(0, lambda: update_progress(app, texts))
+
+        if is_playlist and len(urls) == 1:
+            def show_title(playlist):
+                title = playlist.title or "Lista de reproducción"
+                app.root.after(0, lambda: app.progress_window and app.progress_window.title(f"{lang['progress_title']} - {title}"))
+            job.on_playlist = show_title
+
+        if record:
+            job.resume(record)
+        elif failures:
+            job.retry_failed(failures)
         else:
-            video_urls = urls
-
-        if not video_urls:
-            app.finalize_download(error_message=TRANSLATIONS[app.language_var.get()]['error_no_songs'])
-            return
-
-        app.total_videos = len(video_urls)
-        app.create_progress_window(app.total_videos)
-
-        ydl_opts = {
-            'format': 'bestaudio/best',
-            'outtmpl': os.path.join(app.music_folder, '%(title)s.%(ext)s'),
-            'progress_delta': 0.01,
-            'ignoreerrors': True,
-            'progress_hooks': [lambda d: video_progress_hook(app, d)],
-        }
-        if app.extract_audio_var.get():
-            postprocessors = [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': app.codec_var.get(),
-            }]
-            if app.codec_var.get() in ["mp3", "aac", "opus"]:
-                postprocessors[0]['preferredquality'] = app.bitrate_var.get()
-            if app.metadata_var.get():
-                postprocessors.append({'key': 'FFmpegMetadata'})
-                postprocessors.append({'key': 'EmbedThumbnail'})
-                ydl_opts['writethumbnail'] = True
-            if app.extract_thumbnail_var.get():
-                ydl_opts['writethumbnail'] = True
-            if app.normalization_var.get() != "off":
-                if app.normalization_var.get() == "custom":
-                    norm_args = ['-filter:a', f'loudnorm=I={app.custom_lufs_i_var.get()}:LRA={app.custom_lufs_lra_var.get()}:TP={app.custom_lufs_tp_var.get()}']
-                else:
-                    norm_args = ['-filter:a', 'loudnorm=I=-14:TP=-1.5:LRA=11'] if app.normalization_var.get() == "lufs_14" else \
-                                ['-filter:a', 'loudnorm=I=-23:TP=-2:LRA=7']
-                postprocessors.append({'key': 'FFmpegPostProcessor', 'args': norm_args})
-            if app.dynamic_compression_var.get():
-                postprocessors.append({'key': 'FFmpegPostProcessor', 'args': ['-filter:a', 'acompressor=threshold=-21dB:ratio=9:attack=200:release=1000']})
-            if app.codec_var.get() in ["flac", "wav", "alac"]:
-                postprocessors.append({
-                    'key': 'FFmpegPostProcessor',
-                    'args': [f'-sample_fmt', f's{app.bit_depth_var.get()}', f'-ar', app.sample_rate_var.get()]
-                })
-            if app.channels_var.get() == "mono":
-                postprocessors.append({'key': 'FFmpegPostProcessor', 'args': ['-ac', '1']})
-            elif app.channels_var.get() == "multichannel":
-                postprocessors.append({'key': 'FFmpegPostProcessor', 'args': ['-ac', '6']})
-            ydl_opts['postprocessors'] = postprocessors
-        if app.keep_original_var.get():
-            ydl_opts['keepvideo'] = True
-
-        output_template = ydl_opts['outtmpl']
-        if is_playlist:
-            playlist_title = "Lista de reproducción"
-            with yt_dlp.YoutubeDL(ydl_opts_info) as ydl:
-                info = ydl.extract_info(urls[0], download=False)
-                if 'title' in info:
-                    playlist_title = info['title']
-            playlist_folder = os.path.join(app.music_folder, clean_folder_name(playlist_title))
-            if not os.path.exists(playlist_folder):
-                os.makedirs(playlist_folder)
-            output_template = os.path.join(playlist_folder, '%(title)s.%(ext)s')
-
-        update_progress(app)
-        max_workers = int(app.threads_var.get())
-        app.executor = ThreadPoolExecutor(max_workers=max_workers)
-        futures = [app.executor.submit(download_video, app, url, output_template) for url in video_urls]
-        for future in futures:
-            future.result()
-        app.executor = None
+            job.run(urls, is_playlist)
+        if not job.submitted and not job.control.cancelled:
+            finish(None if job.skipped or job.synced else lang['error_no_songs'])
 
+    except NotAPlaylistError:
+        finish(lang['error_not_playlist'])
     except Exception as e:
-        app.finalize_download(error_message=f"{TRANSLATIONS[app.language_var.get()]['error_process_url'].format(str(e))}")
+        finish(lang['error_process_url'].format(str(e)))
 
 def download_search_songs(app):
     lang = app.language_var.get()
@@ -200,7 +97,6 @@ def download_search_songs(app):
         app.show_result_message('error', TRANSLATIONS[lang]['error_no_songs'])
         return
 
-    app.failed_videos = []
     app.global_progress_var.set(0.0)
     app.video_progress_var.set(0.0)
     app.total_videos = 0
@@ -208,7 +104,7 @@ def download_search_songs(app):
     app.is_paused = False
     app.is_cancelled = False
     app.is_playlist = False
-    Thread(target=download, args=(app, app.search_song_urls, False)).start()
+    start_job(app, new_job(app), list(app.search_song_urls), False)
 
 def download_search_playlist(app, listbox, window):
     lang = app.language_var.get()
@@ -222,7 +118,6 @@ def download_search_playlist(app, listbox, window):
         app.show_result_message('error', TRANSLATIONS[lang]['error_not_playlist'])
         return
 
-    app.failed_videos = []
     app.global_progress_var.set(0.0)
     app.video_progress_var.set(0.0)
     app.total_videos = 0
@@ -230,8 +125,8 @@ def download_search_playlist(app, listbox, window):
     app.is_paused = False
     app.is_cancelled = False
     app.is_playlist = True
-    Thread(target=download, args=(app, [url], True)).start()
-    window.destroy()
+    start_job(app, new_job(app), [url], True)
+    app.close_results_window(window)
 
 def start_songs_download(app):
     lang = app.language_var.get()
@@ -239,7 +134,6 @@ def start_songs_download(app):
         app.show_result_message('error', TRANSLATIONS[lang]['error_no_songs'])
         return
 
-    app.failed_videos = []
     app.global_progress_var.set(0.0)
     app.video_progress_var.set(0.0)
     app.total_videos = 0
@@ -251,7 +145,7 @@ def start_songs_download(app):
     app.songs_pause_button.configure(state='normal')
     app.songs_cancel_button.configure(state='normal')
     urls = [song[0] for song in app.song_urls]
-    Thread(target=download, args=(app, urls, False)).start()
+    start_job(app, new_job(app), urls, False)
 
 def start_playlist_download(app):
     lang = app.language_var.get()
@@ -263,7 +157,6 @@ def start_playlist_download(app):
         app.show_result_message('error', TRANSLATIONS[lang]['error_invalid_url'])
         return
 
-    app.failed_videos = []
     app.global_progress_var.set(0.0)
     app.video_progress_var.set(0.0)
     app.total_videos = 0
@@ -274,4 +167,30 @@ def start_playlist_download(app):
     app.playlist_download_button.configure(state='disabled')
     app.playlist_pause_button.configure(state='normal')
     app.playlist_cancel_button.configure(state='normal')
-    Thread(target=download, args=(app, [url], True)).start()
\ No newline at end of file
+    start_job(app, new_job(app), [url], True)
+
+def resume_download(app, record):
+    """Continue a job of the journal that was interrupted, with the settings it was started with."""
+    app.global_progress_var.set(0.0)
+    app.video_progress_var.set(0.0)
+    app.total_videos = 0
+    app.completed_videos = 0
+    app.is_paused = False
+    app.is_cancelled = False
+    app.is_playlist = record.is_playlist
+    job = new_job(app, JobSettings.from_config(record.settings))
+    start_job(app, job, record.urls, record.is_playlist, record)
+
+def retry_failed_download(app):
+    """Run again only the tracks the last job gave up on, with the settings that job used."""
+    previous = app.job
+    failures = list(previous.failures)
+    app.global_progress_var.set(0.0)
+    app.video_progress_var.set(0.0)
+    app.total_videos = 0
+    app.completed_videos = 0
+    app.is_paused = False
+    app.is_cancelled = False
+    app.is_playlist = False
+    job = new_job(app, previous.settings)
+    start_job(app, job, [track.url for track in failures], False, None, failures)
@@ -1,29 +1,50 @@
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, filedialog, messagebox
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 import os
-import json
-from queue import Queue
 from threading import Thread
 from translations import TRANSLATIONS
 from ui_components import create_search_tab, create_songs_tab, create_playlist_tab, create_audio_options_tab, create_options_tab, create_about_tab
-from download_manager import download, download_search_songs, download_search_playlist, start_songs_download, start_playlist_download
-from utils import clean_folder_name
-import yt_dlp
+from download_manager import download, download_search_songs, download_search_playlist, start_songs_download, start_playlist_download, resume_download, retry_failed_download
+from utils import clean_folder_name, CONFIG_DIR, format_duration
+from library_index import LibraryIndex
+from job_journal import JobJournal, JOB_ABANDONED, JOB_FINISHED, ITEM_QUEUED, ITEM_IN_FLIGHT, ITEM_COMPLETED
+from config_store import ConfigStore
+from search_cache import SearchCache, DetailsPrefetcher, PREFETCH_TOP
+from search_engine import SearchSession
+from bulk_import import parse_urls, read_url_file, import_songs
 import logging
 import re
 import sys
+import time
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Espera tras mostrar la ventana antes de importar yt_dlp en segundo plano
+PRELOAD_DELAY_MS = 1000
+# Espera máxima al hilo de un trabajo interrumpido al cerrar la ventana, y cada cuánto se comprueba
+CLOSE_TIMEOUT = 10
+CLOSE_POLL_MS = 100
+
+def preload_download_engine():
+    """Import the download engine (and with it yt_dlp) off the Tk thread, so the first job starts without a pause."""
+    try:
+        import download_engine  # noqa: F401
+    except Exception as e:
+        logging.error(f"Error preloading the download engine: {e}")
+
 class DownloaderApp:
     # Valores predeterminados para la configuración
     DEFAULT_CONFIG = {
         "language": "es",
         "theme": "litera",
         "threads": "4",
+        "threads_min": "2",
+        "threads_max": "12",
+        "transcode_threads": "auto",
+        "search_page_size": "10",
         "music_folder": None,  # Se establecerá dinámicamente en __init__ usando script_dir
         "codec": "mp3",
         "bitrate": "192",
@@ -39,7 +60,19 @@ class DownloaderApp:
         "extract_thumbnail": False,
         "keep_original": False,
         "dynamic_compression": False,
+        "playlist_sync": False,
+        "sync_flag_removed": False,
     }
+    # Pestañas del cuaderno, en orden; cada una se construye la primera vez que se selecciona
+    TABS = (
+        ("search_tab", create_search_tab),
+        ("songs_tab", create_songs_tab),
+        ("playlist_tab", create_playlist_tab),
+        ("audio_tab", create_audio_options_tab),
+        ("options_tab", create_options_tab),
+        ("about_tab", create_about_tab),
+    )
+
     def __init__(self, root):
         self.root = root
 
@@ -70,7 +103,7 @@ class DownloaderApp:
         self.script_dir = os.path.dirname(os.path.abspath(__file__))
 
         # Crear un directorio persistente para la configuración
-        self.config_dir = os.path.join(os.path.expanduser("~"), ".easytunrmusic")
+        self.config_dir = CONFIG_DIR
         if not os.path.exists(self.config_dir):
             os.makedirs(self.config_dir)
         
@@ -79,8 +112,20 @@ class DownloaderApp:
         self.music_folder_var = tk.StringVar(value=self.music_folder)
         self.DEFAULT_CONFIG["music_folder"] = self.music_folder
         
+        # Índice de las pistas ya descargadas
+        self.library = LibraryIndex(os.path.join(self.config_dir, "library.db"))
+        # Registro de los trabajos, para reanudar los que se interrumpieron
+        self.journal = JobJournal(os.path.join(self.config_dir, "jobs.db"))
+
+        # Caché de búsquedas y metadatos de los resultados, pedidos en segundo plano
+        self.search_cache = SearchCache(os.path.join(self.config_dir, "search_cache.db"))
+        self.search_details = {}  # url -> audio_details(), solo en el hilo de Tk
+        self.prefetcher = DetailsPrefetcher(
+            self.search_cache, on_details=lambda url, details: self.root.after(0, lambda: self.show_search_details(url, details)))
+
         # Load configuration
         self.config_file = os.path.join(self.config_dir, "config.json")
+        self.config_store = ConfigStore(self.config_file, root=self.root, collect=self.collect_config)
         self.load_config()
 
         # Update music folder from config (if available)
@@ -106,7 +151,7 @@ class DownloaderApp:
 
         # Initialize theme_var and apply theme
         self.theme_var = tk.StringVar(value=self.config.get("theme", "litera"))
-        self.theme_var.trace_add("write", lambda *args: [self.update_theme(), self.save_config()])
+        self.theme_var.trace_add("write", lambda *args: [self.update_theme(), self.config_store.mark_dirty()])
 
         # Initialize ttkbootstrap style with the loaded theme
         self.style = ttk.Style(self.theme_var.get())
@@ -121,7 +166,11 @@ class DownloaderApp:
         self.search_query_var = tk.StringVar()
         self.song_entry_var = tk.StringVar()
         self.playlist_url_var = tk.StringVar()
-        self.threads_var = tk.StringVar(value="4")
+        self.threads_var = tk.StringVar(value=self.config.get("threads", "4"))
+        self.threads_min_var = tk.StringVar(value=self.config.get("threads_min", "2"))
+        self.threads_max_var = tk.StringVar(value=self.config.get("threads_max", "12"))
+        self.transcode_threads_var = tk.StringVar(value=self.config.get("transcode_threads", "auto"))
+        self.search_page_size_var = tk.StringVar(value=self.config.get("search_page_size", "10"))
         self.codec_var = tk.StringVar(value=self.config.get("codec", "mp3"))
         self.bitrate_var = tk.StringVar(value=self.config.get("bitrate", "192"))
         self.bit_depth_var = tk.StringVar(value=self.config.get("bit_depth", "16"))
@@ -136,19 +185,27 @@ class DownloaderApp:
         self.extract_thumbnail_var = tk.BooleanVar(value=self.config.get("extract_thumbnail", False))
         self.keep_original_var = tk.BooleanVar(value=self.config.get("keep_original", False))
         self.dynamic_compression_var = tk.BooleanVar(value=self.config.get("dynamic_compression", False))
+        self.playlist_sync_var = tk.BooleanVar(value=self.config.get("playlist_sync", False))
+        self.sync_flag_removed_var = tk.BooleanVar(value=self.config.get("sync_flag_removed", False))
         self.failed_videos = []
         self.global_progress_var = tk.DoubleVar(value=0.0)
         self.video_progress_var = tk.DoubleVar(value=0.0)
-        self.download_queue = Queue()
+        self.progress = None
         self.total_videos = 0
         self.completed_videos = 0
         self.is_paused = False
         self.is_cancelled = False
-        self.executor = None
+        self.control = None
+        self.job = None
+        self.job_thread = None
         self.is_playlist = False
         self.song_urls = []
         self.search_song_urls = []
         self.search_results = []
+        self.results_window = None
+        self.results_listbox = None
+        self.load_more_button = None
+        self.search_session = None
         self.quality_frame_visible = False
         self.bitrate_frame_visible = False
         self.lossless_frame_visible = False
@@ -171,29 +228,16 @@ class DownloaderApp:
         self.notebook = ttk.Notebook(self.root, bootstyle=PRIMARY)
         self.notebook.pack(padx=20, pady=20, fill='both', expand=True)
         
-        # Create tabs
-        logging.debug("Creating tabs")
-        self.search_tab = create_search_tab(self)
-        self.songs_tab = create_songs_tab(self)
-        self.playlist_tab = create_playlist_tab(self)
-        self.audio_tab = create_audio_options_tab(self)
-        self.options_tab = create_options_tab(self)
-        self.about_tab = create_about_tab(self)
-
-        # Add tabs
+        # Add tabs: empty placeholders, replaced by the real tab when first selected
         lang = self.language_var.get()
         logging.debug(f"Adding tabs with language: {lang}")
-        self.notebook.add(self.search_tab, text=TRANSLATIONS[lang]['search_tab'])
-        self.notebook.tab(self.search_tab, state='normal')
-        self.notebook.add(self.songs_tab, text=TRANSLATIONS[lang]['songs_tab'])
-        self.notebook.tab(self.songs_tab, state='normal')
-        self.notebook.add(self.playlist_tab, text=TRANSLATIONS[lang]['playlist_tab'])
-        self.notebook.tab(self.playlist_tab, state='normal')
-        self.notebook.add(self.audio_tab, text=TRANSLATIONS[lang]['audio_tab'])
-        self.notebook.tab(self.audio_tab, state='normal')
-        self.notebook.add(self.options_tab, text=TRANSLATIONS[lang]['options_tab'])
-        self.notebook.tab(self.options_tab, state='normal')
-        self.notebook.add(self.about_tab, text="About")
+        self.built_tabs = set()
+        for name, _ in self.TABS:
+            placeholder = tk.Frame(self.notebook, bg=self.style.colors.bg)
+            setattr(self, name, placeholder)
+            self.notebook.add(placeholder, text=TRANSLATIONS[lang][name], state='normal')
+        self.build_tab("search_tab")
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
 
         # Set up trace callbacks
         self.codec_var.trace("w", self.update_codec_options)
@@ -203,17 +247,17 @@ class DownloaderApp:
         self.search_query_var.trace("w", self.update_quality_frame)
         for var in [self.codec_var, self.bitrate_var, self.bit_depth_var, self.sample_rate_var, self.channels_var,
                     self.normalization_var, self.custom_lufs_i_var, self.custom_lufs_lra_var, self.custom_lufs_tp_var]:
-            var.trace("w", lambda *args: self.save_config())
+            var.trace("w", self.config_store.mark_dirty)
         for var in [self.extract_audio_var, self.metadata_var, self.extract_thumbnail_var, self.keep_original_var,
-                    self.dynamic_compression_var]:
-            var.trace("w", lambda *args: self.save_config())
+                    self.dynamic_compression_var, self.playlist_sync_var, self.sync_flag_removed_var, self.search_page_size_var,
+                    self.threads_var, self.threads_min_var, self.threads_max_var, self.transcode_threads_var]:
+            var.trace("w", self.config_store.mark_dirty)
 
         # Initialize visibility
         self.update_codec_options()
         self.update_norm_options()
 
-        # Initial language and theme update
-        self.update_theme()
+        # Initial language and theme update (update_language also reapplies the theme)
         self.update_language()
 
         # Añadir shortcuts
@@ -222,6 +266,43 @@ class DownloaderApp:
         # Asociar la tecla Enter con la función correspondiente
         self.root.bind("<Return>", self.handle_enter_key)
 
+        # Guardar la configuración pendiente al cerrar
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Ofrecer reanudar una descarga interrumpida una vez que la ventana está visible
+        self.root.after_idle(self.offer_resume)
+
+        # Precargar el motor de descarga en segundo plano cuando la ventana ya está visible
+        self.root.after(PRELOAD_DELAY_MS, lambda: Thread(target=preload_download_engine, daemon=True).start())
+
+    def build_tab(self, name):
+        """Build a tab the first time it is needed, replacing its placeholder in the notebook."""
+        if name in self.built_tabs:
+            return
+        logging.debug(f"Building {name}")
+        builder = dict(self.TABS)[name]
+        placeholder = getattr(self, name)
+        index = self.notebook.index(placeholder)
+        selected = self.notebook.select() == str(placeholder)
+        tab = builder(self)
+        self.built_tabs.add(name)
+        setattr(self, name, tab)
+        self.notebook.insert(index, tab, text=TRANSLATIONS[self.language_var.get()][name], state='normal')
+        if selected:
+            self.notebook.select(tab)
+        self.notebook.forget(placeholder)
+        placeholder.destroy()
+        if name == "audio_tab":
+            self.update_codec_options()
+            self.update_norm_options()
+
+    def on_tab_changed(self, event):
+        current = self.notebook.select()
+        for name, _ in self.TABS:
+            if str(getattr(self, name)) == current:
+                self.build_tab(name)
+                break
+
     def reset_to_defaults(self, scope="all"):
         """Restaura la configuración a los valores predeterminados."""
         logging.debug(f"Resetting configuration to defaults (scope: {scope})")
@@ -230,6 +311,12 @@ class DownloaderApp:
             self.language_var.set(self.DEFAULT_CONFIG["language"])
             self.theme_var.set(self.DEFAULT_CONFIG["theme"])
             self.threads_var.set(self.DEFAULT_CONFIG["threads"])
+            self.threads_min_var.set(self.DEFAULT_CONFIG["threads_min"])
+            self.threads_max_var.set(self.DEFAULT_CONFIG["threads_max"])
+            self.transcode_threads_var.set(self.DEFAULT_CONFIG["transcode_threads"])
+            self.search_page_size_var.set(self.DEFAULT_CONFIG["search_page_size"])
+            self.playlist_sync_var.set(self.DEFAULT_CONFIG["playlist_sync"])
+            self.sync_flag_removed_var.set(self.DEFAULT_CONFIG["sync_flag_removed"])
             self.music_folder_var.set(self.DEFAULT_CONFIG["music_folder"])
             self.music_folder = self.DEFAULT_CONFIG["music_folder"]
             if not os.path.exists(self.music_folder):
@@ -313,14 +400,8 @@ class DownloaderApp:
 
     def load_config(self):
         """Load configuration from config.json."""
-        self.config = {}
-        try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, "r", encoding="utf-8") as f:
-                    self.config = json.load(f)
-        except Exception as e:
-            logging.error(f"Error loading config: {e}")
-        
+        self.config = self.config_store.load()
+
         # Load music folder from configuration
         default_music_folder = os.path.join(self.script_dir, "Música")
         self.music_folder = self.config.get("music_folder", default_music_folder)
@@ -329,8 +410,12 @@ class DownloaderApp:
             os.makedirs(self.music_folder)
 
     def save_config(self):
-        """Guarda la configuración en config.json."""
-        self.config.update({
+        """Programa el guardado de config.json; ConfigStore agrupa los cambios y escribe tras una breve espera."""
+        self.config_store.mark_dirty()
+
+    def collect_config(self):
+        """Current values of the persisted settings, read by ConfigStore right before writing."""
+        return {
             "language": self.language_var.get(),
             "theme": self.theme_var.get(),
             "codec": self.codec_var.get(),
@@ -347,13 +432,60 @@ class DownloaderApp:
             "extract_thumbnail": self.extract_thumbnail_var.get(),
             "keep_original": self.keep_original_var.get(),
             "dynamic_compression": self.dynamic_compression_var.get(),
+            "playlist_sync": self.playlist_sync_var.get(),
+            "sync_flag_removed": self.sync_flag_removed_var.get(),
+            "search_page_size": self.search_page_size_var.get(),
+            "threads": self.threads_var.get(),
+            "threads_min": self.threads_min_var.get(),
+            "threads_max": self.threads_max_var.get(),
+            "transcode_threads": self.transcode_threads_var.get(),
             "music_folder": self.music_folder_var.get(),  # Guardar la carpeta de destino
-        })
-        try:
-            with open(self.config_file, "w", encoding="utf-8") as f:
-                json.dump(self.config, f, indent=4, ensure_ascii=False)
-        except Exception as e:
-            logging.error(f"Error saving config: {e}")
+        }
+
+    def offer_resume(self):
+        """Ask whether to resume the last job that did not finish; older unfinished jobs are dropped."""
+        jobs = self.journal.unfinished_jobs()
+        if not jobs:
+            return
+        record = jobs[0]
+        for older in jobs[1:]:
+            self.journal.set_job_status(older.id, JOB_ABANDONED)
+        counts = self.journal.counts(record.id)
+        pending = counts.get(ITEM_QUEUED, 0) + counts.get(ITEM_IN_FLIGHT, 0)
+        if not pending and record.enumerated:
+            self.journal.set_job_status(record.id, JOB_FINISHED)
+            return
+        lang = self.language_var.get()
+        if messagebox.askyesno(TRANSLATIONS[lang]['resume_title'],
+                               TRANSLATIONS[lang]['resume_prompt'].format(counts.get(ITEM_COMPLETED, 0), pending),
+                               parent=self.root):
+            resume_download(self, record)
+        else:
+            self.journal.set_job_status(record.id, JOB_ABANDONED)
+
+    def on_close(self):
+        """Interrupt the running job (it stays resumable), write the pending configuration and close the window."""
+        self.is_cancelled = True  # Sin más fotogramas de progreso
+        if self.job:
+            self.job.interrupt()
+        self.config_store.flush()
+        self.prefetcher.close()
+        self.root.withdraw()
+        self.close_when_stopped(time.monotonic() + CLOSE_TIMEOUT)
+
+    def close_when_stopped(self, deadline):
+        """Close the stores and the window once the job thread has ended, so no completion is written after close."""
+        # Sin join(): el hilo del trabajo aún puede llamar a root.after(), que necesita el bucle de Tk
+        thread = self.job_thread
+        if thread and thread.is_alive():
+            if time.monotonic() < deadline:
+                self.root.after(CLOSE_POLL_MS, lambda: self.close_when_stopped(deadline))
+                return
+            logging.warning("The interrupted job did not stop in time; closing anyway")
+        self.search_cache.close()
+        self.journal.close()
+        self.library.close()
+        self.root.destroy()
 
     def update_language(self):
         """Actualiza los textos de la interfaz y estilos según el idioma."""
@@ -382,10 +514,13 @@ class DownloaderApp:
         self._update_widget_text(self.options_tab, lang)
         self._update_widget_text(self.about_tab, lang)
     
-        # Actualizar etiquetas de estado
-        self.search_status_label.config(text=TRANSLATIONS[lang]['status_waiting_search'])
-        self.songs_status_label.config(text=TRANSLATIONS[lang]['status_waiting_songs'])
-        self.playlist_status_label.config(text=TRANSLATIONS[lang]['status_waiting_playlist'])
+        # Actualizar etiquetas de estado (solo las de las pestañas ya construidas)
+        if hasattr(self, 'search_status_label'):
+            self.search_status_label.config(text=TRANSLATIONS[lang]['status_waiting_search'])
+        if hasattr(self, 'songs_status_label'):
+            self.songs_status_label.config(text=TRANSLATIONS[lang]['status_waiting_songs'])
+        if hasattr(self, 'playlist_status_label'):
+            self.playlist_status_label.config(text=TRANSLATIONS[lang]['status_waiting_playlist'])
     
         # Reaplicar tema para garantizar consistencia
         self.update_theme()
@@ -472,19 +607,19 @@ class DownloaderApp:
             self.config["music_folder"] = new_folder
             self.save_config()
 
-    def create_progress_window(self, num_videos):
+    def create_progress_window(self, multiple):
         """Create floating window for progress bars."""
         self.progress_window = tk.Toplevel(self.root)
         self.progress_window.iconbitmap(os.path.join(os.path.dirname(os.path.abspath(__file__)), "icon.ico"))
         lang = self.language_var.get()
         self.progress_window.title(TRANSLATIONS[lang]['progress_title'])
-        self.progress_window.geometry("500x250")
+        self.progress_window.geometry("500x280")
         self.progress_window.resizable(False, False)
         self.progress_window.configure(bg=self.style.colors.bg)
 
         # Center window
         window_width = 500
-        window_height = 250
+        window_height = 280
         screen_width = self.root.winfo_screenwidth()
         screen_height = self.root.winfo_screenheight()
         x = (screen_width - window_width) // 2
@@ -506,6 +641,8 @@ class DownloaderApp:
         self.progress_status_label = tk.Label(self.content_frame, text=TRANSLATIONS[lang]['progress_status'], wraplength=450, bg=self.style.colors.bg, font=('Segoe UI', 10))
         self.progress_status_label.pack(pady=10)
         self.widget_translation_keys[str(id(self.progress_status_label))] = 'progress_status'
+        self.progress_workers_label = tk.Label(self.content_frame, text="", wraplength=450, bg=self.style.colors.bg, font=('Segoe UI', 9))
+        self.progress_workers_label.pack()
 
         # Video progress bar
         video_label = ttk.Label(self.content_frame, text=TRANSLATIONS[lang]['progress_video'])
@@ -515,7 +652,7 @@ class DownloaderApp:
         self.progress_video_bar.pack(pady=5)
 
         # Global progress bar (for multiple videos)
-        if num_videos > 1:
+        if multiple:
             global_label = ttk.Label(self.content_frame, text=TRANSLATIONS[lang]['progress_global'])
             global_label.pack(pady=5)
             self.widget_translation_keys[str(id(global_label))] = 'progress_global'
@@ -562,9 +699,20 @@ class DownloaderApp:
         # Show icon and message
         ttk.Label(self.content_frame, text=icon, font=('Segoe UI', 24), foreground=icon_color).pack(pady=10)
         ttk.Label(self.content_frame, text=message, font=('Segoe UI', 10), wraplength=450).pack(pady=10)
-        accept_button = ttk.Button(self.content_frame, text=TRANSLATIONS[lang]['accept_button'], command=self.destroy_progress_window, bootstyle=bootstyle)
-        accept_button.pack(pady=10)
+        button_frame = ttk.Frame(self.content_frame)
+        button_frame.pack(pady=10)
+        accept_button = ttk.Button(button_frame, text=TRANSLATIONS[lang]['accept_button'], command=self.destroy_progress_window, bootstyle=bootstyle)
+        accept_button.pack(side='left', padx=5)
         self.widget_translation_keys[str(id(accept_button))] = 'accept_button'
+        if message_type == 'warning' and self.job and self.job.failures:
+            retry_button = ttk.Button(button_frame, text=TRANSLATIONS[lang]['retry_failed_button'], command=self.retry_failed, bootstyle=SECONDARY)
+            retry_button.pack(side='left', padx=5)
+            self.widget_translation_keys[str(id(retry_button))] = 'retry_failed_button'
+
+    def retry_failed(self):
+        """Close the result window and download again only the tracks that failed."""
+        self.destroy_progress_window()
+        retry_failed_download(self)
 
     def destroy_progress_window(self):
         if self.progress_window:
@@ -576,37 +724,46 @@ class DownloaderApp:
 
     def toggle_pause(self):
         self.is_paused = not self.is_paused
+        if self.control:
+            if self.is_paused:
+                self.control.pause()
+            else:
+                self.control.resume()
         lang = self.language_var.get()
         pause_text = TRANSLATIONS[lang]['resume_button'] if self.is_paused else TRANSLATIONS[lang]['pause_button']
-        self.songs_pause_button.configure(text=pause_text)
-        self.widget_translation_keys[str(id(self.songs_pause_button))] = 'resume_button' if self.is_paused else 'pause_button'
-        self.playlist_pause_button.configure(text=pause_text)
-        self.widget_translation_keys[str(id(self.playlist_pause_button))] = 'resume_button' if self.is_paused else 'pause_button'
+        if hasattr(self, 'songs_pause_button'):
+            self.songs_pause_button.configure(text=pause_text)
+            self.widget_translation_keys[str(id(self.songs_pause_button))] = 'resume_button' if self.is_paused else 'pause_button'
+        if hasattr(self, 'playlist_pause_button'):
+            self.playlist_pause_button.configure(text=pause_text)
+            self.widget_translation_keys[str(id(self.playlist_pause_button))] = 'resume_button' if self.is_paused else 'pause_button'
         if hasattr(self, 'progress_pause_button'):
             self.progress_pause_button.configure(text=pause_text)
             self.widget_translation_keys[str(id(self.progress_pause_button))] = 'resume_button' if self.is_paused else 'pause_button'
         status_text = TRANSLATIONS[lang]['status_paused'] if self.is_paused else \
                       TRANSLATIONS[lang]['status_downloading'] if self.total_videos <= 1 else \
                       TRANSLATIONS[lang]['status_downloading_multiple'].format(self.completed_videos, self.total_videos)
-        self.songs_status_label.config(text=f"{TRANSLATIONS[lang]['progress_status'].split(':')[0]}: {status_text}")
-        self.playlist_status_label.config(text=f"{TRANSLATIONS[lang]['progress_status'].split(':')[0]}: {status_text}")
-        self.search_status_label.config(text=f"{TRANSLATIONS[lang]['progress_status'].split(':')[0]}: {status_text}")
+        for label in ('songs_status_label', 'playlist_status_label', 'search_status_label'):
+            if hasattr(self, label):
+                getattr(self, label).config(text=f"{TRANSLATIONS[lang]['progress_status'].split(':')[0]}: {status_text}")
         if hasattr(self, 'progress_status_label'):
             self.progress_status_label.config(text=f"{TRANSLATIONS[lang]['progress_status'].split(':')[0]}: {status_text}")
 
     def cancel_download(self):
         self.is_cancelled = True
-        if self.executor:
-            self.executor._threads.clear()
+        if self.job:
+            self.job.cancel()
         self.finalize_download(error_message=TRANSLATIONS[self.language_var.get()]['error_title'])
 
     def finalize_download(self, error_message=None):
-        self.songs_download_button.configure(state='normal')
-        self.songs_pause_button.configure(state='disabled')
-        self.songs_cancel_button.configure(state='disabled')
-        self.playlist_download_button.configure(state='normal')
-        self.playlist_pause_button.configure(state='disabled')
-        self.playlist_cancel_button.configure(state='disabled')
+        if "songs_tab" in self.built_tabs:
+            self.songs_download_button.configure(state='normal')
+            self.songs_pause_button.configure(state='disabled')
+            self.songs_cancel_button.configure(state='disabled')
+        if "playlist_tab" in self.built_tabs:
+            self.playlist_download_button.configure(state='normal')
+            self.playlist_pause_button.configure(state='disabled')
+            self.playlist_cancel_button.configure(state='disabled')
         self.global_progress_var.set(0.0)
         self.video_progress_var.set(0.0)
         if error_message:
@@ -618,7 +775,13 @@ class DownloaderApp:
                 )
                 self.show_result_message('warning', error_message)
             else:
-                self.show_result_message('success', TRANSLATIONS[self.language_var.get()]['success_download'])
+                lang = self.language_var.get()
+                sync_notes = [TRANSLATIONS[lang]['sync_removed_entries'].format(count, title)
+                              for title, count in (self.job.removed_entries.items() if self.job else ())]
+                if self.job and self.job.copied:
+                    sync_notes.append(TRANSLATIONS[lang]['copied_tracks_note'].format(self.job.copied, self.job.transcoded))
+                message = "\n".join([TRANSLATIONS[lang]['success_download'], *sync_notes])
+                self.show_result_message('success', message)
         self.update_quality_frame()
 
     def open_search_results(self):
@@ -627,51 +790,77 @@ class DownloaderApp:
         if not query:
             self.show_result_message('error', TRANSLATIONS[lang]['error_no_query'])
             return
-    
+
+        if self.search_session:
+            self.search_session.close()
+        if self.results_window and self.results_window.winfo_exists():
+            self.results_window.destroy()  # Sus filas pertenecen a la búsqueda anterior
+        self.search_session = SearchSession(query, self.search_cache, int(self.search_page_size_var.get()))
         self.search_results = []
+        self.show_results_window()
+        self.load_more_results()
+
+    def load_more_results(self):
+        """Fetch the next page of the current search; results are added to the window as they arrive."""
+        session = self.search_session
+        lang = self.language_var.get()
         self.search_status_label.config(text=TRANSLATIONS[lang]['status_searching'])
+        if self.load_more_button and self.load_more_button.winfo_exists():
+            self.load_more_button.configure(state='disabled')
         self.show_spinner()  # Mostrar spinner
-    
+
         def search():
             try:
-                ydl_opts = {
-                    'quiet': True,
-                    'extract_flat': True,
-                    'force_generic_extractor': False,
-                }
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    results = ydl.extract_info(f"ytsearch10:{query}", download=False)
-                    if 'entries' not in results:
-                        self.root.after(0, lambda: self.search_status_label.config(text=TRANSLATIONS[lang]['status_search_error']))
-                        self.root.after(0, lambda: self.show_result_message('warning', TRANSLATIONS[lang]['status_search_error']))
-                        return
-    
-                    for entry in results['entries']:
-                        title = entry.get('title', 'Sin título')
-                        url = entry.get('url', entry.get('webpage_url', ''))
-                        is_playlist = entry.get('ie_key', '').lower() in ['youtubeplaylist'] or 'playlist?list=' in url
-                        self.search_results.append((title, url, is_playlist))
-    
-                    self.root.after(0, self.show_results_window)
-                    pass
+                page = session.next_page(lambda result: self.root.after(0, lambda: self.add_search_result(session, result)))
+                self.root.after(0, lambda: self.finish_results_page(session, page))
+                # Los primeros resultados de la página se completan en segundo plano mientras el usuario elige
+                self.prefetcher.prefetch([result['url'] for result in page if not result['is_playlist']][:PREFETCH_TOP])
             except Exception as e:
                 self.root.after(0, lambda: self.search_status_label.config(text=TRANSLATIONS[lang]['status_search_error']))
                 self.root.after(0, lambda: self.show_result_message('error', f"{TRANSLATIONS[lang]['error_process_url'].format(str(e))}"))
             finally:
-                self.root.after(0, self.hide_spinner) 
-    
-        Thread(target=search).start()
+                self.root.after(0, self.hide_spinner)
+
+        Thread(target=search, daemon=True).start()
+
+    def add_search_result(self, session, result):
+        if session is not self.search_session:
+            return  # Resultado de una búsqueda anterior
+        self.search_results.append((result['title'], result['url'], result['is_playlist']))
+        if self.results_listbox and self.results_listbox.winfo_exists():
+            self.results_listbox.insert(tk.END, self.search_result_text(
+                result['title'], result['is_playlist'], self.search_details.get(result['url'])))
+
+    def finish_results_page(self, session, page):
+        if session is not self.search_session:
+            return
+        lang = self.language_var.get()
+        if not self.search_results:
+            self.search_status_label.config(text=TRANSLATIONS[lang]['status_search_error'])
+            self.show_result_message('warning', TRANSLATIONS[lang]['status_search_error'])
+            return
+        self.search_status_label.config(text=TRANSLATIONS[lang]['status_search_results'].format(len(self.search_results)))
+        if self.load_more_button and self.load_more_button.winfo_exists():
+            self.load_more_button.configure(state='disabled' if session.exhausted else 'normal')
+        self.update_quality_frame()
+
+    def close_results_window(self, window):
+        if self.search_session:
+            self.search_session.close()
+            self.search_session = None
+        window.destroy()
 
     def show_results_window(self):
         lang = self.language_var.get()
         results_window = tk.Toplevel(self.root)
         results_window.iconbitmap(os.path.join(os.path.dirname(os.path.abspath(__file__)), "icon.ico"))
         results_window.title(TRANSLATIONS[lang]['results_title'])
-        results_window.geometry("500x400")
+        results_window.geometry("600x400")
         results_window.resizable(False, False)
         results_window.configure(bg=self.style.colors.bg)
+        results_window.protocol("WM_DELETE_WINDOW", lambda: self.close_results_window(results_window))
 
-        window_width = 500
+        window_width = 600
         window_height = 400
         screen_width = self.root.winfo_screenwidth()
         screen_height = self.root.winfo_screenheight()
@@ -685,9 +874,10 @@ class DownloaderApp:
         results_listbox = tk.Listbox(results_window, width=60, height=12, font=('Segoe UI', 10), bg='#FFFFFF', relief='flat', borderwidth=1)
         results_listbox.pack(pady=10, anchor="center")
 
-        for title, _, is_playlist in self.search_results:
-            display_text = f"[{'Lista' if is_playlist else 'Canción'}] {title}" if lang == 'es' else f"[{'Playlist' if is_playlist else 'Song'}] {title}"
-            results_listbox.insert(tk.END, display_text)
+        for title, url, is_playlist in self.search_results:
+            results_listbox.insert(tk.END, self.search_result_text(title, is_playlist, self.search_details.get(url)))
+        self.results_listbox = results_listbox
+        self.results_window = results_window
 
         action_frame = tk.Frame(results_window, bg=self.style.colors.bg)
         action_frame.pack(pady=10)
@@ -697,12 +887,35 @@ class DownloaderApp:
         download_playlist_button = ttk.Button(action_frame, text=TRANSLATIONS[lang]['download_playlist_button'], command=lambda: download_search_playlist(self, results_listbox, results_window))
         download_playlist_button.pack(side='left', padx=5)
         self.widget_translation_keys[str(id(download_playlist_button))] = 'download_playlist_button'
-        close_button = ttk.Button(action_frame, text=TRANSLATIONS[lang]['close_button'], command=results_window.destroy, bootstyle=SECONDARY)
+        self.load_more_button = ttk.Button(action_frame, text=TRANSLATIONS[lang]['load_more_button'], command=self.load_more_results, state='disabled', bootstyle=SECONDARY)
+        self.load_more_button.pack(side='left', padx=5)
+        self.widget_translation_keys[str(id(self.load_more_button))] = 'load_more_button'
+        close_button = ttk.Button(action_frame, text=TRANSLATIONS[lang]['close_button'], command=lambda: self.close_results_window(results_window), bootstyle=SECONDARY)
         close_button.pack(side='left', padx=5)
         self.widget_translation_keys[str(id(close_button))] = 'close_button'
 
-        self.search_status_label.config(text=TRANSLATIONS[lang]['status_search_results'].format(len(self.search_results)))
-        self.update_quality_frame()
+    def search_result_text(self, title, is_playlist, details=None):
+        lang = self.language_var.get()
+        display_text = f"[{'Lista' if is_playlist else 'Canción'}] {title}" if lang == 'es' else f"[{'Playlist' if is_playlist else 'Song'}] {title}"
+        if details:
+            extra = [part for part in (details.get('uploader'),
+                                       format_duration(details['duration']) if details.get('duration') else None) if part]
+            if extra:
+                display_text = f"{display_text} ({' · '.join(extra)})"
+        return display_text
+
+    def show_search_details(self, url, details):
+        """Store the prefetched details of a result and show them in the open results window."""
+        self.search_details[url] = details
+        if not self.results_listbox or not self.results_listbox.winfo_exists():
+            return
+        for index, (title, result_url, is_playlist) in enumerate(self.search_results):
+            if result_url == url:
+                selected = index in self.results_listbox.curselection()
+                self.results_listbox.delete(index)
+                self.results_listbox.insert(index, self.search_result_text(title, is_playlist, details))
+                if selected:
+                    self.results_listbox.selection_set(index)
 
     def add_to_search_queue(self, listbox, window):
         lang = self.language_var.get()
@@ -716,10 +929,13 @@ class DownloaderApp:
             self.show_result_message('error', TRANSLATIONS[lang]['error_select_song'])
             return
         self.search_song_urls.append(url)
+        details = self.search_details.get(url)
+        if details and details.get('uploader'):
+            title = f"{title} - {details['uploader']}"
         self.search_song_listbox.insert(tk.END, title)
         self.search_status_label.config(text=TRANSLATIONS[lang]['status_song_added'].format(len(self.search_song_urls)))
         self.update_quality_frame()
-        window.destroy()
+        self.close_results_window(window)
 
     def remove_search_song(self):
         lang = self.language_var.get()
@@ -749,29 +965,34 @@ class DownloaderApp:
 
         def process_song():
             try:
-                ydl_opts = {
-                    'quiet': True,
-                    'extract_flat': True,
-                    'force_generic_extractor': False,
-                }
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(url, download=False)
-                    is_playlist = info.get('ie_key', '').lower() in ['youtubeplaylist'] or 'playlist?list=' in url
-                    if is_playlist or 'entries' in info:
-                        self.root.after(0, lambda: self.show_result_message('error', TRANSLATIONS[lang]['error_playlist_in_songs']))
-                        self.root.after(0, lambda: self.songs_status_label.config(text=TRANSLATIONS[lang]['status_waiting_songs']))
-                        return
-    
-                    title = info.get('title', 'Sin título' if lang == 'es' else 'No title')
-                    author = info.get('uploader', info.get('channel', 'Desconocido' if lang == 'es' else 'Unknown'))
-                    display_text = f"{title} - {author}"
-                    self.root.after(0, lambda: self.song_urls.append((url, title, author)))
-                    self.root.after(0, lambda: self.song_listbox.insert(tk.END, display_text))
-                    self.root.after(0, lambda: self.song_entry_var.set(""))
-                    self.root.after(0, lambda: self.songs_status_label.config(
-                        text=TRANSLATIONS[lang]['status_song_added'].format(len(self.song_urls))))
-                    self.root.after(0, self.update_quality_frame)
-                    pass
+                # Los resultados de búsqueda ya consultados no necesitan otra extracción
+                details = self.search_cache.get_details(url)
+                if details:
+                    info = {key: details[key] for key in ('title', 'uploader') if details.get(key)}
+                else:
+                    import yt_dlp  # Se importa en el hilo de trabajo al primer uso, no al arrancar
+                    ydl_opts = {
+                        'quiet': True,
+                        'extract_flat': True,
+                        'force_generic_extractor': False,
+                    }
+                    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                        info = ydl.extract_info(url, download=False)
+                is_playlist = info.get('ie_key', '').lower() in ['youtubeplaylist'] or 'playlist?list=' in url
+                if is_playlist or 'entries' in info:
+                    self.root.after(0, lambda: self.show_result_message('error', TRANSLATIONS[lang]['error_playlist_in_songs']))
+                    self.root.after(0, lambda: self.songs_status_label.config(text=TRANSLATIONS[lang]['status_waiting_songs']))
+                    return
+
+                title = info.get('title', 'Sin título' if lang == 'es' else 'No title')
+                author = info.get('uploader', info.get('channel', 'Desconocido' if lang == 'es' else 'Unknown'))
+                display_text = f"{title} - {author}"
+                self.root.after(0, lambda: self.song_urls.append((url, title, author)))
+                self.root.after(0, lambda: self.song_listbox.insert(tk.END, display_text))
+                self.root.after(0, lambda: self.song_entry_var.set(""))
+                self.root.after(0, lambda: self.songs_status_label.config(
+                    text=TRANSLATIONS[lang]['status_song_added'].format(len(self.song_urls))))
+                self.root.after(0, self.update_quality_frame)
             except Exception as e:
                 self.root.after(0, lambda: self.show_result_message('error',
                                                                     TRANSLATIONS[lang]['error_process_url'].format(str(e))))
@@ -794,6 +1015,69 @@ class DownloaderApp:
         self.songs_status_label.config(text=TRANSLATIONS[lang]['status_song_removed'].format(len(self.song_urls)))
         self.update_quality_frame()
 
+    def import_songs_from_clipboard(self):
+        try:
+            text = self.root.clipboard_get()
+        except tk.TclError:
+            text = ""
+        self.start_song_import(parse_urls(text))
+
+    def import_songs_from_file(self):
+        lang = self.language_var.get()
+        path = filedialog.askopenfilename(
+            title=TRANSLATIONS[lang]['import_songs_button'],
+            filetypes=[(TRANSLATIONS[lang]['import_file_types'], "*.txt *.csv *.m3u *.m3u8"), ("*", "*.*")])
+        if not path:
+            return
+        try:
+            urls = read_url_file(path)
+        except OSError as e:
+            self.show_result_message('error', TRANSLATIONS[lang]['error_process_url'].format(str(e)))
+            return
+        self.start_song_import(urls)
+
+    def start_song_import(self, urls):
+        """Add many songs at once: titles are resolved in parallel and inserted in batches."""
+        lang = self.language_var.get()
+        if not urls:
+            self.show_result_message('warning', TRANSLATIONS[lang]['error_no_urls'])
+            return
+
+        buttons = (self.add_button, self.paste_songs_button, self.import_songs_button)
+        for button in buttons:
+            button.configure(state='disabled')
+        self.songs_status_label.config(text=TRANSLATIONS[lang]['status_importing'].format(len(urls)))
+        self.show_spinner()
+        known_urls = [song[0] for song in self.song_urls]
+
+        def add_batch(batch):
+            self.song_urls.extend(batch)
+            self.song_listbox.insert(tk.END, *(f"{title} - {author}" for _, title, author in batch))
+            self.songs_status_label.config(text=TRANSLATIONS[lang]['status_song_added'].format(len(self.song_urls)))
+
+        def finish(result):
+            status = TRANSLATIONS[lang]['status_import_done'].format(result.added, len(self.song_urls))
+            if result.duplicates or result.playlists or result.failed:
+                status = f"{status}\n" + TRANSLATIONS[lang]['status_import_rejected'].format(
+                    result.duplicates, result.playlists, len(result.failed))
+            for url, error in result.failed:
+                logging.warning(f"Import of {url} failed: {error}")
+            self.songs_status_label.config(text=status)
+            self.update_quality_frame()
+
+        def run():
+            try:
+                result = import_songs(urls, known_urls, lambda batch: self.root.after(0, lambda: add_batch(batch)),
+                                      cache=self.search_cache)
+                self.root.after(0, lambda: finish(result))
+            except Exception as e:
+                self.root.after(0, lambda: self.show_result_message('error', TRANSLATIONS[lang]['error_process_url'].format(str(e))))
+            finally:
+                self.root.after(0, lambda: [button.configure(state='normal') for button in buttons])
+                self.root.after(0, self.hide_spinner)
+
+        Thread(target=run, daemon=True).start()
+
     def update_quality_frame(self, *args):
         """Actualiza la visibilidad y sincronización de las opciones de calidad de audio."""
         has_search_songs = len(self.search_song_urls) > 0
@@ -801,7 +1085,9 @@ class DownloaderApp:
         has_playlist = self.playlist_url_var.get().strip()
         has_search = len(self.search_results) > 0
     
-        if (has_search_songs or has_songs or has_playlist or has_search) and not self.quality_frame_visible:
+        if "audio_tab" not in self.built_tabs:
+            pass  # La pestaña de audio ajusta su visibilidad al construirse
+        elif (has_search_songs or has_songs or has_playlist or has_search) and not self.quality_frame_visible:
             logging.debug("Packing quality_frame in audio_tab")
             self.quality_frame.pack(fill='x', pady=10, padx=10)
             self.quality_frame_visible = True
@@ -817,22 +1103,10 @@ class DownloaderApp:
             self.lossless_frame_visible = False
             self.custom_norm_frame_visible = False
             self.quality_frame_visible = False
-    
-        # Sincronizar las opciones de audio con las variables globales
-        self.config.update({
-            "codec": self.codec_var.get(),
-            "bitrate": self.bitrate_var.get(),
-            "bit_depth": self.bit_depth_var.get(),
-            "sample_rate": self.sample_rate_var.get(),
-            "channels": self.channels_var.get(),
-            "normalization": self.normalization_var.get(),
-            "custom_lufs_i": self.custom_lufs_i_var.get(),
-            "custom_lufs_lra": self.custom_lufs_lra_var.get(),
-            "custom_lufs_tp": self.custom_lufs_tp_var.get(),
-        })
-        self.save_config()
 
     def update_codec_options(self, *args):
+        if "audio_tab" not in self.built_tabs:
+            return
         codec = self.codec_var.get()
         logging.debug(f"Updating codec options: codec={codec}")
         if codec in ["mp3", "aac", "opus"]:
@@ -855,6 +1129,8 @@ class DownloaderApp:
                 self.lossless_frame_visible = True
 
     def update_norm_options(self, *args):
+        if "audio_tab" not in self.built_tabs:
+            return
         norm = self.normalization_var.get()
         logging.debug(f"Updating normalization options: norm={norm}")
         if norm == "custom":
@@ -0,0 +1,106 @@
+import os
+import signal
+import subprocess
+import threading
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when the job it belongs to has been cancelled."""
+
+
+def _suspend_process(proc):
+    if os.name == "nt":
+        import ctypes
+        ctypes.windll.ntdll.NtSuspendProcess(int(proc._handle))
+    else:
+        os.kill(proc.pid, signal.SIGSTOP)
+
+
+def _resume_process(proc):
+    if os.name == "nt":
+        import ctypes
+        ctypes.windll.ntdll.NtResumeProcess(int(proc._handle))
+    else:
+        os.kill(proc.pid, signal.SIGCONT)
+
+
+class JobControl:
+    """Pause and cancellation primitives shared by every worker of a job.
+
+    Workers call checkpoint() between steps and from the yt-dlp progress hook,
+    which blocks while the job is paused and raises JobCancelled once it is
+    cancelled. Child processes started through run_process() are suspended,
+    resumed or killed together with the job.
+    """
+
+    def __init__(self):
+        self._running = threading.Event()
+        self._running.set()
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._processes = set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def pause(self):
+        with self._lock:
+            if self.cancelled or self.paused:
+                return
+            self._running.clear()
+            for proc in self._processes:
+                _suspend_process(proc)
+
+    def resume(self):
+        with self._lock:
+            if not self.paused:
+                return
+            for proc in self._processes:
+                _resume_process(proc)
+            self._running.set()
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled.set()
+            for proc in self._processes:
+                if self.paused:
+                    _resume_process(proc)
+                proc.kill()
+            # Despertar a los trabajadores en pausa para que vean la cancelación
+            self._running.set()
+
+    def checkpoint(self):
+        """Block while paused and raise JobCancelled if the job was cancelled."""
+        if not self._running.is_set():
+            self._running.wait()
+        if self._cancelled.is_set():
+            raise JobCancelled()
+
+    def progress_hook(self, d):
+        """yt-dlp progress hook that suspends or aborts the transfer in place."""
+        self.checkpoint()
+
+    def run_process(self, cmd):
+        """Run a child process under the control of the job and return (returncode, stderr)."""
+        self.checkpoint()
+        proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+        with self._lock:
+            self._processes.add(proc)
+            if self.cancelled:
+                proc.kill()
+            elif self.paused:
+                _suspend_process(proc)
+        try:
+            _, stderr = proc.communicate()
+        finally:
+            with self._lock:
+                self._processes.discard(proc)
+        if self.cancelled:
+            raise JobCancelled()
+        return proc.returncode, stderr.decode('utf-8', 'replace')
@@ -0,0 +1,144 @@
+import json
+import time
+from sqlite_store import SQLiteStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created REAL NOT NULL,
+    settings TEXT NOT NULL,
+    urls TEXT NOT NULL,
+    is_playlist INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    enumerated INTEGER NOT NULL DEFAULT 0,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id INTEGER NOT NULL REFERENCES jobs(id),
+    url TEXT NOT NULL,
+    extractor TEXT,
+    video_id TEXT,
+    output_template TEXT NOT NULL,
+    extra_info TEXT,
+    status TEXT NOT NULL,
+    error TEXT,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS job_items_job ON job_items (job_id, status);
+"""
+
+# Estados de un trabajo
+JOB_RUNNING = 'running'
+JOB_FINISHED = 'finished'
+JOB_CANCELLED = 'cancelled'
+JOB_ABANDONED = 'abandoned'
+# Estados de una pista
+ITEM_QUEUED = 'queued'
+ITEM_IN_FLIGHT = 'in_flight'
+ITEM_COMPLETED = 'completed'
+ITEM_FAILED = 'failed'
+
+
+class JournalItem:
+    """A track of a journaled job, as stored in job_items."""
+
+    def __init__(self, id, url, extractor, video_id, output_template, extra_info, status, error):
+        self.id = id
+        self.url = url
+        self.key = (extractor, video_id) if extractor and video_id else None
+        self.output_template = output_template
+        self.extra_info = json.loads(extra_info) if extra_info else None
+        self.status = status
+        self.error = error
+
+
+class JobRecord:
+    """A job of the journal: its settings and sources, as passed to DownloadJob."""
+
+    def __init__(self, id, created, settings, urls, is_playlist, status, enumerated):
+        self.id = id
+        self.created = created
+        self.settings = json.loads(settings)
+        self.urls = json.loads(urls)
+        self.is_playlist = bool(is_playlist)
+        self.status = status
+        self.enumerated = bool(enumerated)
+
+
+class JobJournal(SQLiteStore):
+    """SQLite journal of the download jobs and of every track they queue.
+
+    Each track moves through queued, in_flight and completed or failed, and
+    every change is committed at once, so after a crash the journal knows
+    which tracks of a job still have to be downloaded. A job still marked as
+    running when the application starts did not finish and can be resumed.
+    """
+
+    def __init__(self, path):
+        super().__init__(path, SCHEMA, pragmas=("journal_mode=WAL", "synchronous=NORMAL"))
+
+    def _write(self, sql, params=()):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                return conn.execute(sql, params)
+
+    def _read(self, sql, params=()):
+        with self._lock:
+            return self._connection().execute(sql, params).fetchall()
+
+    def start_job(self, settings, urls, is_playlist):
+        """Record a new job and return its id."""
+        now = time.time()
+        return self._write(
+            "INSERT INTO jobs (created, settings, urls, is_playlist, status, updated) VALUES (?, ?, ?, ?, ?, ?)",
+            (now, json.dumps(settings.to_dict()), json.dumps(list(urls)), int(is_playlist), JOB_RUNNING, now)).lastrowid
+
+    def set_job_status(self, job_id, status):
+        self._write("UPDATE jobs SET status = ?, updated = ? WHERE id = ?", (status, time.time(), job_id))
+
+    def mark_enumerated(self, job_id):
+        """Every source of the job has been listed: the pending items are all that is left."""
+        self._write("UPDATE jobs SET enumerated = 1, updated = ? WHERE id = ?", (time.time(), job_id))
+
+    def add_item(self, job_id, url, key, output_template, extra_info):
+        """Record a queued track and return its id."""
+        extractor, video_id = key if key else (None, None)
+        return self._write(
+            "INSERT INTO job_items (job_id, url, extractor, video_id, output_template, extra_info, status, updated) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, url, extractor, video_id, output_template,
+             json.dumps(extra_info, ensure_ascii=False) if extra_info else None, ITEM_QUEUED, time.time())).lastrowid
+
+    def set_item_status(self, item_id, status, error=None):
+        self._write("UPDATE job_items SET status = ?, error = ?, updated = ? WHERE id = ?",
+                    (status, error, time.time(), item_id))
+
+    def job(self, job_id):
+        rows = self._read("SELECT id, created, settings, urls, is_playlist, status, enumerated FROM jobs WHERE id = ?",
+                          (job_id,))
+        return JobRecord(*rows[0]) if rows else None
+
+    def unfinished_jobs(self):
+        """Jobs that were running when the application stopped, newest first."""
+        rows = self._read("SELECT id, created, settings, urls, is_playlist, status, enumerated FROM jobs "
+                          "WHERE status = ? ORDER BY id DESC", (JOB_RUNNING,))
+        return [JobRecord(*row) for row in rows]
+
+    def items(self, job_id, statuses=None):
+        sql = ("SELECT id, url, extractor, video_id, output_template, extra_info, status, error "
+               "FROM job_items WHERE job_id = ?")
+        params = [job_id]
+        if statuses:
+            sql += f" AND status IN ({', '.join('?' for _ in statuses)})"
+            params.extend(statuses)
+        return [JournalItem(*row) for row in self._read(sql + " ORDER BY id", params)]
+
+    def pending_items(self, job_id):
+        """Tracks of a job that were queued or downloading when it stopped."""
+        return self.items(job_id, (ITEM_QUEUED, ITEM_IN_FLIGHT))
+
+    def counts(self, job_id):
+        """{status: number of tracks} of a job."""
+        return dict(self._read("SELECT status, COUNT(*) FROM job_items WHERE job_id = ? GROUP BY status", (job_id,)))
@@ -0,0 +1,125 @@
+import hashlib
+import json
+from dataclasses import dataclass, asdict, fields
+from functools import cached_property
+
+# Opciones que cambian el archivo de audio producido
+OUTPUT_FIELDS = ("extract_audio", "codec", "bitrate", "bit_depth", "sample_rate", "channels",
+                 "normalization", "custom_lufs_i", "custom_lufs_lra", "custom_lufs_tp", "dynamic_compression")
+
+
+@dataclass(frozen=True)
+class JobSettings:
+    """Snapshot of every option a download job needs, taken once on the Tk thread."""
+    language: str = "es"
+    music_folder: str = ""
+    threads: int = 4  # 0 = automático, entre threads_min y threads_max
+    threads_min: int = 2
+    threads_max: int = 12
+    transcode_threads: int = 0  # 0 = un hilo por núcleo
+    codec: str = "mp3"
+    bitrate: str = "192"
+    bit_depth: str = "16"
+    sample_rate: str = "44100"
+    channels: str = "stereo"
+    normalization: str = "off"
+    custom_lufs_i: str = "-14"
+    custom_lufs_lra: str = "11"
+    custom_lufs_tp: str = "-1.5"
+    extract_audio: bool = True
+    metadata: bool = True
+    extract_thumbnail: bool = False
+    keep_original: bool = False
+    dynamic_compression: bool = False
+    playlist_sync: bool = False
+    sync_flag_removed: bool = False
+
+    @classmethod
+    def from_app(cls, app):
+        """Read the Tk variables of the application. Must be called from the Tk thread."""
+        return cls(
+            language=app.language_var.get(),
+            music_folder=app.music_folder,
+            threads=0 if app.threads_var.get() == "auto" else int(app.threads_var.get()),
+            threads_min=int(app.threads_min_var.get()),
+            threads_max=int(app.threads_max_var.get()),
+            transcode_threads=0 if app.transcode_threads_var.get() == "auto" else int(app.transcode_threads_var.get()),
+            codec=app.codec_var.get(),
+            bitrate=app.bitrate_var.get(),
+            bit_depth=app.bit_depth_var.get(),
+            sample_rate=app.sample_rate_var.get(),
+            channels=app.channels_var.get(),
+            normalization=app.normalization_var.get(),
+            custom_lufs_i=app.custom_lufs_i_var.get(),
+            custom_lufs_lra=app.custom_lufs_lra_var.get(),
+            custom_lufs_tp=app.custom_lufs_tp_var.get(),
+            extract_audio=app.extract_audio_var.get(),
+            metadata=app.metadata_var.get(),
+            extract_thumbnail=app.extract_thumbnail_var.get(),
+            keep_original=app.keep_original_var.get(),
+            dynamic_compression=app.dynamic_compression_var.get(),
+            playlist_sync=app.playlist_sync_var.get(),
+            sync_flag_removed=app.sync_flag_removed_var.get(),
+        )
+
+    @classmethod
+    def from_config(cls, config, **overrides):
+        """Build the settings from a config.json dict without Tk; unknown keys and None overrides are ignored."""
+        values = {}
+        for field in fields(cls):
+            value = overrides.get(field.name)
+            if value is None:
+                value = config.get(field.name)
+            if value is None:
+                continue
+            if field.type == 'int' or field.type is int:
+                value = 0 if value == "auto" else int(value)
+            elif field.type == 'bool' or field.type is bool:
+                value = value if isinstance(value, bool) else str(value).lower() in ("1", "true", "yes", "on")
+            else:
+                value = str(value)
+            values[field.name] = value
+        return cls(**values)
+
+    def to_dict(self):
+        return asdict(self)
+
+    @cached_property
+    def output_hash(self):
+        """Hash of the options that change the produced file, stored in the library index."""
+        fields = {name: getattr(self, name) for name in OUTPUT_FIELDS}
+        return hashlib.sha1(json.dumps(fields, sort_keys=True).encode("utf-8")).hexdigest()
+
+    @cached_property
+    def audio_pipeline(self):
+        """The compiled AudioPipeline, or None when audio extraction is disabled."""
+        if not self.extract_audio:
+            return None
+        from audio_pipeline import AudioPipeline  # Importa yt_dlp: solo se carga al lanzar un trabajo
+        return AudioPipeline(
+            codec=self.codec,
+            bitrate=self.bitrate,
+            bit_depth=self.bit_depth,
+            sample_rate=self.sample_rate,
+            channels=self.channels,
+            normalization=self.normalization,
+            custom_lufs=(self.custom_lufs_i, self.custom_lufs_lra, self.custom_lufs_tp),
+            dynamic_compression=self.dynamic_compression,
+        )
+
+    def ydl_options(self, output_template):
+        """Base yt-dlp options for this job; progress hooks are added by the caller."""
+        ydl_opts = {
+            # Con un AudioPipeline, se prefiere un flujo que se pueda copiar sin recodificar
+            'format': self.audio_pipeline.format_selector() if self.audio_pipeline else 'bestaudio/best',
+            'outtmpl': output_template,
+            'progress_delta': 0.01,
+            'quiet': True,
+            # Las descargas interrumpidas continúan desde su archivo .part al reanudar el trabajo
+            'continuedl': True,
+        }
+        if self.extract_audio and (self.metadata or self.extract_thumbnail):
+            ydl_opts['writethumbnail'] = True
+        if self.keep_original:
+            ydl_opts['keepvideo'] = True
+        return ydl_opts
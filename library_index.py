@@ -0,0 +1,231 @@
+import os
+import time
+from sqlite_store import SQLiteStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    extractor TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    path TEXT NOT NULL,
+    settings_hash TEXT NOT NULL,
+    size INTEGER,
+    duration REAL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (extractor, video_id)
+);
+CREATE TABLE IF NOT EXISTS track_files (
+    extractor TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    path TEXT NOT NULL,
+    settings_hash TEXT NOT NULL,
+    duration REAL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (extractor, video_id, path)
+);
+CREATE TABLE IF NOT EXISTS playlist_entries (
+    playlist_url TEXT NOT NULL,
+    extractor TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    removed INTEGER NOT NULL DEFAULT 0,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (playlist_url, extractor, video_id)
+);
+CREATE TABLE IF NOT EXISTS loudness (
+    extractor TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    input_i REAL NOT NULL,
+    input_lra REAL NOT NULL,
+    input_tp REAL NOT NULL,
+    input_thresh REAL NOT NULL,
+    target_offset REAL NOT NULL,
+    target TEXT NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (extractor, video_id)
+);
+CREATE TABLE IF NOT EXISTS output_loudness (
+    extractor TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    settings_hash TEXT NOT NULL,
+    input_i REAL NOT NULL,
+    input_lra REAL NOT NULL,
+    input_tp REAL NOT NULL,
+    input_thresh REAL NOT NULL,
+    target_offset REAL NOT NULL,
+    target TEXT NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (extractor, video_id, settings_hash)
+);
+"""
+
+_extractor_classes = None
+
+
+def track_key(url):
+    """(extractor, video id) of a URL, resolved offline from the extractor patterns, or None."""
+    global _extractor_classes
+    if _extractor_classes is None:
+        from yt_dlp.extractor import gen_extractor_classes
+        _extractor_classes = [ie for ie in gen_extractor_classes() if ie.ie_key() != 'Generic']
+    for ie in _extractor_classes:
+        if ie.suitable(url):
+            video_id = ie.get_temp_id(url)
+            return (ie.ie_key(), video_id) if video_id else None
+    return None
+
+
+class LibraryIndex(SQLiteStore):
+    """SQLite index of the tracks already downloaded, keyed by extractor and video id.
+
+    A track is skipped when it was produced with the same audio settings and its
+    file is still on disk. The connection is shared by the workers of a job and
+    every write runs in its own transaction.
+    """
+
+    def __init__(self, path):
+        super().__init__(path, SCHEMA)
+
+    def _migrate(self, conn):
+        if conn.execute("PRAGMA user_version").fetchone()[0] < 1:
+            # Índices anteriores a track_files: cada pista tenía un solo archivo, el de tracks
+            with conn:
+                conn.execute(
+                    "INSERT OR IGNORE INTO track_files (extractor, video_id, path, settings_hash, duration, updated) "
+                    "SELECT extractor, video_id, path, settings_hash, duration, updated FROM tracks")
+                conn.execute("PRAGMA user_version = 1")
+
+    def lookup(self, key, settings_hash, folder=None):
+        """Path of a file of the track made with these settings that still exists, preferably in `folder`, else None."""
+        if key is None:
+            return None
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT path FROM track_files WHERE extractor = ? AND video_id = ? AND settings_hash = ?",
+                (*key, settings_hash)).fetchall()
+        paths = [path for path, in rows if os.path.exists(path)]
+        if folder is not None:
+            folder = os.path.normpath(folder)
+            for path in paths:
+                if os.path.dirname(os.path.normpath(path)) == folder:
+                    return path
+        return paths[0] if paths else None
+
+    def record(self, info, settings_hash):
+        """Store a finished track from its final yt-dlp info dict."""
+        downloads = info.get('requested_downloads') or [info]
+        path = downloads[-1].get('filepath')
+        if not path or not os.path.exists(path):
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO tracks (extractor, video_id, path, settings_hash, size, duration, updated) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (info['extractor_key'], info['id'], path, settings_hash,
+                     os.path.getsize(path), info.get('duration'), now))
+                conn.execute(
+                    "INSERT OR REPLACE INTO track_files (extractor, video_id, path, settings_hash, duration, updated) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (info['extractor_key'], info['id'], path, settings_hash, info.get('duration'), now))
+
+    def record_copy(self, key, source, path):
+        """Store `path` as another file of a track, copied from its indexed file `source`."""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO track_files (extractor, video_id, path, settings_hash, duration, updated) "
+                    "SELECT extractor, video_id, ?, settings_hash, duration, ? FROM track_files "
+                    "WHERE extractor = ? AND video_id = ? AND path = ?", (path, time.time(), *key, source))
+
+    def playlist_entries(self, playlist_url):
+        """{(extractor, video_id): removed} of the entries already fetched from a playlist."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT extractor, video_id, removed FROM playlist_entries WHERE playlist_url = ?",
+                (playlist_url,)).fetchall()
+        return {(extractor, video_id): bool(removed) for extractor, video_id, removed in rows}
+
+    def record_playlist_entry(self, playlist_url, key):
+        """Remember that an entry of a playlist is in the library."""
+        if key is None:
+            return
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO playlist_entries (playlist_url, extractor, video_id, removed, last_seen) "
+                    "VALUES (?, ?, ?, 0, ?)", (playlist_url, *key, time.time()))
+
+    def flag_removed_entries(self, playlist_url, seen_keys):
+        """Flag the entries of a playlist that were not seen in a full listing. Returns how many were flagged."""
+        known = self.playlist_entries(playlist_url)
+        removed = [key for key, was_removed in known.items() if key not in seen_keys and not was_removed]
+        restored = [key for key, was_removed in known.items() if key in seen_keys and was_removed]
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    "UPDATE playlist_entries SET removed = 1 WHERE playlist_url = ? AND extractor = ? AND video_id = ?",
+                    [(playlist_url, *key) for key in removed])
+                conn.executemany(
+                    "UPDATE playlist_entries SET removed = 0 WHERE playlist_url = ? AND extractor = ? AND video_id = ?",
+                    [(playlist_url, *key) for key in restored])
+        return len(removed)
+
+    def loudness(self, key, settings_hash=None):
+        """Cached loudness measurement ({input_i, ..., target_offset, target}) of a source track, or None.
+
+        With settings_hash it is the measurement of the file produced from the
+        track with those settings instead of the source's.
+        """
+        if key is None:
+            return None
+        with self._lock:
+            if settings_hash is None:
+                row = self._connection().execute(
+                    "SELECT input_i, input_lra, input_tp, input_thresh, target_offset, target FROM loudness "
+                    "WHERE extractor = ? AND video_id = ?", key).fetchone()
+            else:
+                row = self._connection().execute(
+                    "SELECT input_i, input_lra, input_tp, input_thresh, target_offset, target FROM output_loudness "
+                    "WHERE extractor = ? AND video_id = ? AND settings_hash = ?", (*key, settings_hash)).fetchone()
+        if not row:
+            return None
+        return dict(zip(('input_i', 'input_lra', 'input_tp', 'input_thresh', 'target_offset', 'target'), row))
+
+    def record_loudness(self, key, measured, target, settings_hash=None):
+        """Store the loudness of a source track, or with settings_hash of the file produced from it with those settings.
+
+        `target` is the one target_offset was measured for.
+        """
+        values = (measured['input_i'], measured['input_lra'], measured['input_tp'], measured['input_thresh'],
+                  measured['target_offset'], target, time.time())
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                if settings_hash is None:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO loudness (extractor, video_id, input_i, input_lra, input_tp, "
+                        "input_thresh, target_offset, target, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (*key, *values))
+                else:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO output_loudness (extractor, video_id, settings_hash, input_i, input_lra, "
+                        "input_tp, input_thresh, target_offset, target, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (*key, settings_hash, *values))
+
+    def folder_loudness(self, folder):
+        """[(path, duration, input_i, input_tp)] of the indexed files directly in `folder` that have been measured."""
+        folder = os.path.normpath(folder)
+        prefix = folder + os.sep
+        with self._lock:
+            # La medida del archivo tal como está en disco, no la de su fuente; track_files tiene un archivo
+            # por carpeta, así que una pista de dos listas cuenta en el álbum de cada una
+            rows = self._connection().execute(
+                "SELECT t.path, t.duration, l.input_i, l.input_tp FROM track_files t "
+                "JOIN output_loudness l ON l.extractor = t.extractor AND l.video_id = t.video_id "
+                "AND l.settings_hash = t.settings_hash "
+                "WHERE substr(t.path, 1, ?) = ?", (len(prefix), prefix)).fetchall()
+        return [row for row in rows if os.path.dirname(os.path.normpath(row[0])) == folder and os.path.exists(row[0])]
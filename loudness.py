@@ -0,0 +1,91 @@
+import json
+import logging
+import math
+import loudness_meter
+
+# Campos del informe JSON de loudnorm que necesita la segunda pasada
+LOUDNORM_FIELDS = ('input_i', 'input_lra', 'input_tp', 'input_thresh', 'target_offset')
+
+
+def target_tag(target):
+    """Text form of a (I, LRA, TP) target, stored next to the offset measured for it."""
+    return ":".join(str(value) for value in target)
+
+
+def loudnorm_filter(target, measured=None):
+    """loudnorm filter for a (I, LRA, TP) target; with a measurement of the source it runs in linear mode."""
+    i, lra, tp = target
+    graph = f'loudnorm=I={i}:LRA={lra}:TP={tp}'
+    if measured:
+        graph += (f":measured_I={measured['input_i']:.2f}:measured_LRA={measured['input_lra']:.2f}"
+                  f":measured_TP={measured['input_tp']:.2f}:measured_thresh={measured['input_thresh']:.2f}"
+                  f":offset={measured['target_offset']:.2f}:linear=true")
+    return graph
+
+
+def parse_loudnorm_report(stderr):
+    """Measurement printed by loudnorm with print_format=json, or None if it is missing or not finite (silence)."""
+    start = stderr.rfind('{')
+    end = stderr.rfind('}')
+    if start < 0 or end < start:
+        return None
+    try:
+        report = json.loads(stderr[start:end + 1])
+        measured = {field: float(report[field]) for field in LOUDNORM_FIELDS}
+    except (ValueError, KeyError):
+        return None
+    return measured if all(math.isfinite(value) for value in measured.values()) else None
+
+
+class LoudnessAnalyzer:
+    """First pass of the two-pass loudness normalization, with its results kept in the library index.
+
+    measure() returns the loudness of a source track (integrated loudness, LRA,
+    true peak, threshold and offset, as loudnorm reports them) so the encode can
+    apply loudnorm in linear mode. Measurements are stored per track, so
+    exporting the same track again, to another codec or another target, skips
+    the measurement decode; the offset is only reused for the target it was
+    measured against. With NumPy installed the measurement comes from the
+    in-process meter (loudness_meter), else from a first loudnorm pass.
+    Measurements of produced files are cached apart from the source's, under
+    the settings hash of the file.
+    """
+
+    def __init__(self, control, library=None):
+        self.control = control
+        self.library = library
+
+    def measure(self, ffmpeg, source, key, target, settings_hash=None):
+        """Measurement of `source` for a (I, LRA, TP) target, or None to fall back to a single dynamic pass.
+
+        With settings_hash, `source` is the file produced from track `key` with those settings.
+        """
+        cached = self.library.loudness(key, settings_hash) if self.library and key else None
+        if cached:
+            measured = {field: cached[field] for field in LOUDNORM_FIELDS}
+            if cached['target'] != target_tag(target):
+                measured['target_offset'] = 0.0
+            return measured
+
+        if loudness_meter.available():
+            measured = self._meter(ffmpeg, source)
+        else:
+            cmd = [ffmpeg, '-hide_banner', '-nostdin', '-nostats', '-i', source, '-map', '0:a:0', '-vn',
+                   '-filter:a', f'{loudnorm_filter(target)}:print_format=json', '-f', 'null', '-']
+            returncode, stderr = self.control.run_process(cmd)
+            measured = parse_loudnorm_report(stderr) if returncode == 0 else None
+        if measured is None or not all(math.isfinite(value) for value in measured.values()):
+            logging.warning(f"Loudness measurement of {source} failed; normalizing in a single pass")
+            return None
+        if self.library and key:
+            self.library.record_loudness(key, measured, target_tag(target), settings_hash)
+        logging.info(loudness_meter.format_report_line(source, measured))
+        return measured
+
+    def _meter(self, ffmpeg, source):
+        try:
+            # El decodificado sigue la pausa y la cancelación del trabajo; el cálculo corre en este mismo hilo
+            return loudness_meter.analyze_file(source, ffmpeg, run=self.control.run_process)
+        except (ValueError, OSError) as e:
+            logging.warning(f"Loudness meter failed on {source}: {e}")
+            return None
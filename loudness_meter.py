@@ -0,0 +1,283 @@
+"""In-process EBU R128 loudness meter (ITU-R BS.1770-4, EBU Tech 3342).
+
+Measures integrated loudness, loudness range and true peak with NumPy. The
+source is decoded once by ffmpeg to a 48 kHz float WAV file, which is memory
+mapped and processed in blocks of CHUNK_SECONDS:
+- K-weighting is one FFT convolution (overlap-save) with the impulse response
+  of the two BS.1770 filters;
+- the 400 ms gating blocks and the 3 s short-term windows come from a cumulative
+  sum of the 100 ms segment energies;
+- the true peak is taken on a 4x polyphase interpolation.
+
+NumPy is optional: available() is False without it, and the normalization then
+measures with the first pass of loudnorm instead.
+
+    python loudness_meter.py track1.opus track2.m4a ...   # per-track report
+    python loudness_meter.py --json --workers 4 *.flac
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import struct
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+try:
+    import numpy as np
+except ImportError:  # El medidor es opcional
+    np = None
+
+SAMPLE_RATE = 48000
+SEGMENT = SAMPLE_RATE // 10  # 100 ms
+CHUNK_SECONDS = 10
+CHUNK = CHUNK_SECONDS * SAMPLE_RATE
+# Longitud de la respuesta al impulso de la ponderación K (el filtro paso alto decae en ~0,1 s)
+IR_LENGTH = 16384
+OVERSAMPLE = 4
+TRUE_PEAK_TAPS = 49
+ABSOLUTE_GATE = -70.0
+RELATIVE_GATE = -10.0  # LU, loudness integrada
+LRA_RELATIVE_GATE = -20.0  # LU, rango de loudness
+LRA_PERCENTILES = (10, 95)
+
+# Coeficientes (b, a) de la ponderación K a 48 kHz: filtro de estantería y paso alto RLB
+K_SHELF = ((1.53512485958697, -2.69169618940638, 1.19839281085285), (1.0, -1.69065929318241, 0.73248077421585))
+K_HIGHPASS = ((1.0, -2.0, 1.0), (1.0, -1.99004745483398, 0.99007225036621))
+# Pesos por canal de BS.1770 para 5.1 (FL FR FC LFE BL BR); el LFE no cuenta
+SURROUND_WEIGHTS = (1.0, 1.0, 1.0, 0.0, 1.41, 1.41)
+
+_filters = {}
+
+
+def available():
+    return np is not None
+
+
+def decode_command(ffmpeg, source, wav_path):
+    """ffmpeg command that decodes the first audio stream of `source` to a 48 kHz float WAV file."""
+    return [ffmpeg, '-y', '-nostdin', '-loglevel', 'error', '-i', source, '-map', '0:a:0', '-vn',
+            '-map_metadata', '-1', '-fflags', '+bitexact', '-ar', str(SAMPLE_RATE), '-c:a', 'pcm_f32le',
+            '-f', 'wav', wav_path]
+
+
+def _run(cmd):
+    proc = subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                          creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+    return proc.returncode, proc.stderr.decode('utf-8', 'replace')
+
+
+def _wav_layout(path):
+    """(data offset, data size, channels) of a 32-bit float WAV file written by ffmpeg."""
+    file_size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.read(12)
+        if header[:4] not in (b'RIFF', b'RF64') or header[8:12] != b'WAVE':
+            raise ValueError(f"{path} is not a WAV file")
+        channels = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                raise ValueError(f"{path} has no audio data")
+            chunk_id, size = chunk[:4], struct.unpack('<I', chunk[4:])[0]
+            if chunk_id == b'fmt ':
+                fmt = f.read(size)
+                channels = struct.unpack('<H', fmt[2:4])[0]
+                bits = struct.unpack('<H', fmt[14:16])[0]
+                if bits != 32:
+                    raise ValueError(f"{path} is not 32-bit float")
+                if size & 1:
+                    f.seek(1, 1)
+            elif chunk_id == b'data':
+                offset = f.tell()
+                if channels is None:
+                    raise ValueError(f"{path} has no format chunk")
+                # RF64 o un tamaño sin completar: los datos llegan hasta el final del archivo
+                if size in (0, 0xFFFFFFFF) or offset + size > file_size:
+                    size = file_size - offset
+                return offset, size, channels
+            else:
+                f.seek(size + (size & 1), 1)
+
+
+def _biquad_response(coefficients, z):
+    (b0, b1, b2), (a0, a1, a2) = coefficients
+    return (b0 + b1 * z + b2 * z * z) / (a0 + a1 * z + a2 * z * z)
+
+
+def _k_weighting(fft_size):
+    """Spectrum of the K-weighting impulse response, zero-padded to fft_size."""
+    spectrum = _filters.get(('k', fft_size))
+    if spectrum is None:
+        n = 2 * IR_LENGTH
+        z = np.exp(-2j * np.pi * np.arange(n // 2 + 1) / n)  # z^-1 en cada frecuencia de la FFT
+        response = _biquad_response(K_SHELF, z) * _biquad_response(K_HIGHPASS, z)
+        impulse = np.fft.irfft(response, n)[:IR_LENGTH]
+        spectrum = _filters[('k', fft_size)] = np.fft.rfft(impulse, fft_size)
+    return spectrum
+
+
+def _true_peak_phases():
+    """The OVERSAMPLE polyphase branches of a windowed-sinc interpolation filter."""
+    phases = _filters.get('tp')
+    if phases is None:
+        n = np.arange(TRUE_PEAK_TAPS) - (TRUE_PEAK_TAPS - 1) / 2
+        taps = np.sinc(n / OVERSAMPLE) * np.hanning(TRUE_PEAK_TAPS + 2)[1:-1]
+        phases = _filters['tp'] = [taps[phase::OVERSAMPLE] for phase in range(OVERSAMPLE)]
+    return phases
+
+
+def _loudness(power):
+    with np.errstate(divide='ignore'):
+        return -0.691 + 10 * np.log10(power)
+
+
+def _window_power(segment_power, segments):
+    """Mean power of every window of `segments` consecutive 100 ms segments, one window per segment."""
+    if len(segment_power) < segments:
+        return np.empty(0)
+    total = np.concatenate(([0.0], np.cumsum(segment_power)))
+    return (total[segments:] - total[:-segments]) / segments
+
+
+def _gated(power, relative_gate):
+    """Blocks above the absolute gate and the relative gate, and the relative threshold."""
+    power = power[_loudness(power) > ABSOLUTE_GATE]
+    if not len(power):
+        return power, -math.inf
+    threshold = float(_loudness(power.mean())) + relative_gate
+    return power[_loudness(power) > threshold], threshold
+
+
+def measure_wav(path):
+    """Loudness of a 48 kHz float WAV file, in the fields loudnorm reports (input_i, input_lra, ...)."""
+    offset, size, channels = _wav_layout(path)
+    frames = size // (4 * channels)
+    if not frames:
+        raise ValueError(f"{path} is empty")
+    data = np.memmap(path, dtype='<f4', mode='r', offset=offset, shape=(frames, channels))
+    try:
+        weights = np.array(SURROUND_WEIGHTS if channels == 6 else (1.0,) * channels)
+        segments = frames // SEGMENT
+        weighted_frames = segments * SEGMENT
+        fft_size = 1 << (CHUNK + IR_LENGTH - 2).bit_length()
+        k_weighting = _k_weighting(fft_size)[:, None]
+        phases = _true_peak_phases()
+        history = max(IR_LENGTH - 1, TRUE_PEAK_TAPS)
+        segment_energy = np.zeros((segments, channels))
+        peak = 0.0
+        for start in range(0, frames, CHUNK):
+            end = min(start + CHUNK, frames)
+            lead = min(start, history)
+            block = np.asarray(data[start - lead:end], dtype=np.float64)
+            samples = block[lead:]
+
+            # Ponderación K por solapamiento y descarte; antes del inicio del archivo hay silencio
+            k_end = min(end, weighted_frames)
+            if k_end > start:
+                k_lead = min(lead, IR_LENGTH - 1)
+                x = block[lead - k_lead:lead + k_end - start]
+                if k_lead < IR_LENGTH - 1:
+                    x = np.concatenate((np.zeros((IR_LENGTH - 1 - k_lead, channels)), x))
+                y = np.fft.irfft(np.fft.rfft(x, fft_size, axis=0) * k_weighting, fft_size, axis=0)
+                y = y[IR_LENGTH - 1:IR_LENGTH - 1 + k_end - start]
+                segment_energy[start // SEGMENT:k_end // SEGMENT] = \
+                    np.square(y).reshape(-1, SEGMENT, channels).sum(axis=1)
+
+            # Pico real: máximo de la señal sobremuestreada 4x
+            tp_lead = min(lead, TRUE_PEAK_TAPS)
+            x = block[lead - tp_lead:]
+            for channel in range(channels):
+                for taps in phases:
+                    upsampled = np.convolve(x[:, channel], taps)[tp_lead:tp_lead + len(samples)]
+                    peak = max(peak, float(np.abs(upsampled).max()))
+            peak = max(peak, float(np.abs(samples).max()))
+    finally:
+        del data
+
+    segment_power = segment_energy @ weights / SEGMENT
+    blocks, threshold = _gated(_window_power(segment_power, 4), RELATIVE_GATE)
+    integrated = float(_loudness(blocks.mean())) if len(blocks) else -math.inf
+    short_term, _ = _gated(_window_power(segment_power, 30), LRA_RELATIVE_GATE)
+    if len(short_term):
+        low, high = np.percentile(_loudness(short_term), LRA_PERCENTILES)
+        lra = float(high - low)
+    else:
+        lra = 0.0
+    true_peak = 20 * math.log10(peak) if peak > 0 else -math.inf
+    return {'input_i': integrated, 'input_lra': lra, 'input_tp': true_peak, 'input_thresh': threshold,
+            'target_offset': 0.0}
+
+
+def analyze_file(source, ffmpeg='ffmpeg', run=None):
+    """Decode `source` once and measure it. run(cmd) -> (returncode, stderr) runs ffmpeg (e.g. JobControl.run_process).
+
+    The measurement runs on the calling thread. NumPy releases the GIL inside
+    the FFTs, convolutions and array arithmetic on whole chunks, so the
+    transcode threads of a job measure in parallel without a process pool.
+    """
+    fd, wav_path = tempfile.mkstemp(prefix='loudness-', suffix='.wav')
+    os.close(fd)
+    try:
+        returncode, stderr = (run or _run)(decode_command(ffmpeg, source, wav_path))
+        if returncode != 0:
+            stderr = stderr.strip()
+            raise ValueError(stderr.splitlines()[-1] if stderr else f'ffmpeg exited with code {returncode}')
+        return measure_wav(wav_path)
+    finally:
+        os.remove(wav_path)
+
+
+def _analyze(source, ffmpeg):
+    try:
+        return source, analyze_file(source, ffmpeg), None
+    except Exception as e:
+        return source, None, str(e)
+
+
+def analyze_files(paths, ffmpeg='ffmpeg', workers=None):
+    """Measure many files on a process pool. Yields (path, measurement or None, error or None) as they finish.
+
+    Only for the command line report: the application measures on its own threads.
+    """
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 2) as executor:
+        futures = [executor.submit(_analyze, path, ffmpeg) for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def format_report_line(path, measured):
+    """One line of the per-track report."""
+    return (f"{measured['input_i']:7.1f} LUFS  {measured['input_lra']:5.1f} LU  {measured['input_tp']:6.1f} dBTP  "
+            f"{os.path.basename(path)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EBU R128 loudness report of audio files.")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--workers", type=int, help="parallel analyses (default: one per core)")
+    parser.add_argument("--ffmpeg", default="ffmpeg", help="ffmpeg executable")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per track")
+    args = parser.parse_args(argv)
+    if not available():
+        parser.error("NumPy is not installed")
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    failed = 0
+    for path, measured, error in analyze_files(args.files, args.ffmpeg, args.workers):
+        if error:
+            failed += 1
+            logging.error(f"{path}: {error}")
+        elif args.json:
+            print(json.dumps({'path': path, 'integrated': measured['input_i'], 'lra': measured['input_lra'],
+                              'true_peak': measured['input_tp'], 'threshold': measured['input_thresh']}), flush=True)
+        else:
+            print(format_report_line(path, measured), flush=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue, Full
+import yt_dlp
+from library_index import track_key
+
+PLAYLIST_OPTS = {
+    'quiet': True,
+    'noplaylist': False,
+}
+# Extractores cuyas entradas son a su vez listas (p. ej. las pestañas de un canal)
+NESTED_PLAYLIST_IES = ('YoutubeTab',)
+# Listas que se enumeran a la vez dentro de un mismo trabajo
+MAX_ENUMERATION_WORKERS = 4
+_DONE = object()
+
+
+class NotAPlaylistError(Exception):
+    """The URL does not resolve to a playlist."""
+
+
+def _resolve(ydl, url, ie_key=None):
+    """Resolve a URL without processing its entries, following redirections to other extractors."""
+    info = ydl.extract_info(url, download=False, process=False, ie_key=ie_key)
+    while info.get('_type') in ('url', 'url_transparent'):
+        info = ydl.extract_info(info['url'], download=False, process=False, ie_key=info.get('ie_key'))
+    return info
+
+
+def _iter_entries(ydl, entries):
+    for entry in entries:
+        if not entry:
+            continue
+        if entry.get('_type') == 'playlist':
+            yield from _iter_entries(ydl, entry.get('entries') or [])
+        elif entry.get('ie_key') in NESTED_PLAYLIST_IES:
+            yield from _iter_entries(ydl, _resolve(ydl, entry['url'], entry['ie_key']).get('entries') or [])
+        elif entry_url(entry):
+            yield entry
+
+
+def entry_url(entry):
+    return entry.get('url') or entry.get('webpage_url')
+
+
+def entry_track_key(entry):
+    """(extractor, video id) of a flat entry, as used by the library index."""
+    if entry.get('id') and entry.get('ie_key'):
+        return entry['ie_key'], entry['id']
+    return track_key(entry_url(entry))
+
+
+def entry_key(entry):
+    """Identity of an entry, used to drop tracks that appear in several playlists."""
+    if entry.get('id'):
+        return entry.get('ie_key'), entry['id']
+    return entry_url(entry)
+
+
+class Playlist:
+    """A playlist resolved once per job: its header fields plus its lazily fetched entries."""
+
+    def __init__(self, url):
+        self.url = url
+        self._ydl = yt_dlp.YoutubeDL(PLAYLIST_OPTS)
+        try:
+            self.info = _resolve(self._ydl, url)
+        except Exception:
+            self._ydl.close()
+            raise
+        if 'entries' not in self.info:
+            self._ydl.close()
+            raise NotAPlaylistError(url)
+        self.title = self.info.get('title')
+        self.uploader = self.info.get('uploader') or self.info.get('channel')
+        self._pending = _iter_entries(self._ydl, self.info['entries'])
+
+    def entries(self):
+        """Yield the flat entries once, fetching further pages only when they are needed; none are kept."""
+        yield from self._pending
+
+    def track_info(self, index):
+        """Extra fields merged into the info dict of the track at the given 1-based position."""
+        info = {'playlist': self.title, 'playlist_webpage_url': self.url, 'playlist_index': index, 'track_number': index}
+        if self.title:
+            info['album'] = self.title
+        if self.uploader:
+            info['album_artist'] = self.uploader
+        return info
+
+    def close(self):
+        self._ydl.close()
+
+
+class PlaylistMetadataCache:
+    """Playlists resolved during a job, so each playlist URL is fetched exactly once."""
+
+    def __init__(self):
+        self._playlists = {}
+        self._lock = threading.Lock()
+        self._url_locks = {}
+
+    def get(self, url):
+        with self._lock:
+            url_lock = self._url_locks.setdefault(url, threading.Lock())
+        # Un bloqueo por URL: listas distintas se resuelven en paralelo, la misma solo una vez
+        with url_lock:
+            playlist = self._playlists.get(url)
+            if playlist is None:
+                playlist = self._playlists[url] = Playlist(url)
+        return playlist
+
+    def close(self):
+        with self._lock:
+            playlists, self._playlists = list(self._playlists.values()), {}
+        for playlist in playlists:
+            playlist.close()
+
+
+def iter_playlists(playlists, urls, on_resolved, select_entries=None, max_workers=MAX_ENUMERATION_WORKERS):
+    """Enumerate several playlists concurrently; yields (playlist, index, entry, context) without duplicates."""
+    urls = list(dict.fromkeys(urls))
+    queue = Queue(maxsize=256)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=0.2)
+                return True
+            except Full:
+                continue
+        return False
+
+    def produce(url):
+        try:
+            playlist = playlists.get(url)
+            context = on_resolved(playlist)
+            entries = enumerate(playlist.entries(), start=1)
+            if select_entries:
+                entries = select_entries(playlist, entries)
+            for index, entry in entries:
+                if not put((playlist, index, entry, context)):
+                    return
+        except Exception as e:
+            put(e)
+        finally:
+            put(_DONE)
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(urls)) or 1)
+    for url in urls:
+        executor.submit(produce, url)
+    seen = set()  # Solo las claves: lo mínimo para descartar repetidas entre listas
+    remaining = len(urls)
+    try:
+        while remaining:
+            item = queue.get()
+            if item is _DONE:
+                remaining -= 1
+                continue
+            if isinstance(item, Exception):
+                raise item
+            key = entry_key(item[2])
+            if key in seen:
+                continue
+            seen.add(key)
+            yield item
+    finally:
+        stop.set()
+        executor.shutdown(wait=False)
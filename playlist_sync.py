@@ -0,0 +1,57 @@
+import logging
+from urllib.parse import urlparse
+from playlist_source import entry_track_key
+
+# Entradas ya conocidas seguidas que indican que el resto de la lista no ha cambiado
+SYNC_KNOWN_RUN = 10
+# Pestañas de canal de YouTube que se listan de la más nueva a la más antigua
+NEWEST_FIRST_TABS = ('/videos', '/streams', '/shorts')
+
+
+def newest_first(playlist):
+    """Whether a playlist is known to list its entries newest first, e.g. the uploads tab of a channel."""
+    if playlist.info.get('extractor_key') != 'YoutubeTab':
+        return False
+    path = urlparse(playlist.info.get('webpage_url') or playlist.url).path.rstrip('/')
+    return path.endswith(NEWEST_FIRST_TABS)
+
+
+class PlaylistSync:
+    """Incremental sync: only the entries added to a playlist since the last run are downloaded.
+
+    The entries already fetched from each playlist are stored in the library
+    index, and the flat listing is compared with them by video id, so entries
+    added anywhere in the playlist are found even when others were removed.
+    Only for a listing known to be newest first (see newest_first()) paging
+    stops after a run of SYNC_KNOWN_RUN known entries. When a listing is walked
+    to the end, the stored entries missing from it can be flagged as removed.
+    """
+
+    def __init__(self, library, flag_removed=False):
+        self.library = library
+        self.flag_removed = flag_removed
+        self.removed = {}  # título de la lista -> entradas marcadas como eliminadas
+
+    def select(self, playlist, entries):
+        """Filter the (index, entry) pairs of a playlist down to the new entries."""
+        known = self.library.playlist_entries(playlist.url)
+        stop_early = bool(known) and newest_first(playlist)
+        seen = set()
+        known_run = 0
+        for index, entry in entries:
+            key = entry_track_key(entry)
+            seen.add(key)
+            if key in known:
+                known_run += 1
+                if stop_early and known_run >= SYNC_KNOWN_RUN:
+                    # Lista de más nueva a más antigua: el resto ya se conoce
+                    logging.info(f"Playlist {playlist.url}: {SYNC_KNOWN_RUN} known entries in a row, stopping")
+                    return
+                continue
+            known_run = 0
+            yield index, entry
+
+        if self.flag_removed and known:
+            removed = self.library.flag_removed_entries(playlist.url, seen)
+            if removed:
+                self.removed[playlist.title or playlist.url] = removed
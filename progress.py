@@ -0,0 +1,149 @@
+import itertools
+import threading
+
+# Frecuencia de refresco de la ventana de progreso (20 Hz)
+FRAME_INTERVAL_MS = 50
+
+
+class WorkerProgress:
+    """Progress of the track a single worker is downloading. Only its worker writes to it."""
+    __slots__ = ('index', 'active', 'transcoding', 'percent', 'downloaded_bytes', 'finished_bytes', 'speed', 'completed')
+
+    def __init__(self):
+        self.index = None  # Se asigna al primer track_started(): solo los hilos de descarga tienen número
+        self.active = False
+        self.transcoding = False
+        self.percent = 0.0
+        self.downloaded_bytes = 0
+        self.finished_bytes = 0
+        self.speed = 0.0
+        self.completed = 0
+
+
+class ProgressSnapshot:
+    """Aggregated view of a job, produced once per UI frame."""
+
+    def __init__(self, total, closed, completed, workers, transcoding, speed, downloaded_bytes, finalizing=False):
+        self.total = total
+        self.closed = closed  # No se añadirán más pistas al total
+        self.finalizing = finalizing  # Las pistas terminaron, pero el trabajo aún no
+        self.completed = completed
+        self.workers = workers  # [(index, percent)] de los trabajadores activos
+        self.transcoding = transcoding  # pistas en ffmpeg ahora mismo
+        self.speed = speed
+        self.downloaded_bytes = downloaded_bytes
+
+    @property
+    def video_percent(self):
+        if not self.workers:
+            return 100.0 if self.closed and self.completed and self.completed >= self.total else 0.0
+        return sum(percent for _, percent in self.workers) / len(self.workers)
+
+    @property
+    def global_percent(self):
+        if self.total <= 0:
+            return 0.0
+        partial = sum(percent for _, percent in self.workers) / 100
+        return min(100.0, (self.completed + partial) / self.total * 100)
+
+
+class ProgressAggregator:
+    """Collects progress from the worker threads without locks on the hot path.
+
+    Every worker owns a WorkerProgress slot and is the only thread writing to it,
+    so the yt-dlp progress hook just stores plain attributes. The Tk thread calls
+    snapshot() at a fixed frame rate and turns the slots into one UI update.
+    """
+
+    def __init__(self, total=0):
+        self.total = total
+        self.closed = False
+        self.finished = False  # El trabajo terminó antes de completar sus pistas (error o nada que descargar)
+        self.finalizing = False  # Queda trabajo tras la última pista (la ganancia de álbum)
+        self._slots = {}
+        self._lock = threading.Lock()  # Solo para crear slots nuevos
+        self._indexes = itertools.count(1)
+
+    def _slot(self):
+        ident = threading.get_ident()
+        slot = self._slots.get(ident)
+        if slot is None:
+            with self._lock:
+                slot = self._slots[ident] = WorkerProgress()
+        return slot
+
+    def track_started(self):
+        """A download worker starts fetching a track."""
+        slot = self._slot()
+        if slot.index is None:
+            slot.index = next(self._indexes)
+        slot.percent = 0.0
+        slot.downloaded_bytes = 0
+        slot.speed = 0.0
+        slot.active = True
+
+    def hook(self, d):
+        """yt-dlp progress hook."""
+        slot = self._slot()
+        if d['status'] == 'downloading':
+            downloaded = d.get('downloaded_bytes') or 0
+            total = d.get('total_bytes') or d.get('total_bytes_estimate')
+            if total:
+                slot.percent = min(100.0, downloaded / total * 100)
+            slot.downloaded_bytes = downloaded
+            slot.speed = d.get('speed') or 0.0
+        elif d['status'] == 'finished':
+            slot.percent = 100.0
+            slot.speed = 0.0
+
+    def download_finished(self):
+        """The download worker is done with the network part of its track."""
+        slot = self._slot()
+        slot.active = False
+        slot.speed = 0.0
+        slot.finished_bytes += slot.downloaded_bytes
+        slot.downloaded_bytes = 0
+
+    def transcode_started(self):
+        self._slot().transcoding = True
+
+    def transcode_finished(self):
+        self._slot().transcoding = False
+
+    def track_done(self):
+        """A track left the job, finished or failed. May run on any worker thread."""
+        self._slot().completed += 1
+
+    def close(self):
+        """Called by the producer once every track of the job has been queued."""
+        self.closed = True
+
+    def finish(self):
+        """Called when the job ends without completing its tracks; the UI stops drawing frames."""
+        self.closed = True
+        self.finished = True
+
+    def snapshot(self):
+        # Leer closed antes que total: el productor escribe total antes de cerrar
+        closed = self.closed
+        slots = list(self._slots.values())
+        workers = [(slot.index, slot.percent) for slot in slots if slot.active]
+        return ProgressSnapshot(
+            total=self.total,
+            closed=closed,
+            completed=sum(slot.completed for slot in slots),
+            workers=sorted(workers),
+            transcoding=sum(1 for slot in slots if slot.transcoding),
+            speed=sum(slot.speed for slot in slots if slot.active),
+            downloaded_bytes=sum(slot.finished_bytes + slot.downloaded_bytes for slot in slots),
+            finalizing=self.finalizing,
+        )
+
+
+def format_speed(bytes_per_second):
+    for unit in ('B/s', 'KB/s', 'MB/s'):
+        if bytes_per_second < 1024:
+            return f"{bytes_per_second:.1f} {unit}"
+        bytes_per_second /= 1024
+    return f"{bytes_per_second:.1f} GB/s"
+
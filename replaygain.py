@@ -0,0 +1,134 @@
+import logging
+import math
+import os
+
+# Nivel de referencia de ReplayGain 2.0 y de las etiquetas R128 de Opus (RFC 7845)
+REPLAYGAIN_REFERENCE = -18.0
+R128_REFERENCE = -23.0
+# Objetivo de la primera pasada de loudnorm cuando se mide sin NumPy; solo se usan los valores de entrada
+MEASURE_TARGET = ("-18", "11", "-1")
+# Contenedores sin etiquetas libres
+UNTAGGABLE_EXTENSIONS = ("wav",)
+# Contenedores Ogg: sus comentarios Vorbis se escriben con mutagen cuando está instalado
+OGG_EXTENSIONS = ("opus", "ogg")
+# Contenedores MP4: átomos libres ----:com.apple.iTunes:<nombre>, solo con mutagen
+MP4_EXTENSIONS = ("m4a", "mp4")
+MP4_FREEFORM = "----:com.apple.iTunes:"
+
+
+def gain_tags(fmt, scope, loudness, true_peak):
+    """Tags of a track or album gain for a codec or file extension: R128_<scope>_GAIN for Opus, REPLAYGAIN_* otherwise."""
+    if fmt == "opus":
+        # Q7.8 en dB, relativo a -23 LUFS
+        return {f'R128_{scope}_GAIN': str(round((R128_REFERENCE - loudness) * 256))}
+    return {
+        f'REPLAYGAIN_{scope}_GAIN': f'{REPLAYGAIN_REFERENCE - loudness:+.2f} dB',
+        f'REPLAYGAIN_{scope}_PEAK': f'{10 ** (true_peak / 20):.6f}',
+    }
+
+
+def album_loudness(tracks):
+    """(loudness, true peak) of an album from its tracks' (duration, loudness, true peak).
+
+    The loudness is the duration-weighted energy mean of the tracks, which stands
+    in for gating the blocks of the whole album at once.
+    """
+    tracks = [(duration or 1.0, loudness, peak) for duration, loudness, peak in tracks]
+    total = sum(duration for duration, _, _ in tracks)
+    energy = sum(duration * 10 ** (loudness / 10) for duration, loudness, _ in tracks) / total
+    return 10 * math.log10(energy), max(peak for _, _, peak in tracks)
+
+
+def tag_command(ffmpeg, path, tags, target):
+    """Remux `path` into `target` with the audio copied and `tags` added to the existing metadata."""
+    ext = os.path.splitext(path)[1].lstrip('.').lower()
+    ogg = ext in OGG_EXTENSIONS
+    # En Ogg solo el audio: ffmpeg lee una carátula METADATA_BLOCK_PICTURE como otro flujo, que el muxer
+    # Ogg rechaza (con mutagen instalado los archivos Ogg no pasan por aquí, ver write_tags)
+    cmd = [ffmpeg, '-y', '-nostdin', '-loglevel', 'error', '-i', path, '-map', '0:a' if ogg else '0', '-c', 'copy',
+           '-map_metadata', '0']
+    # En Ogg las etiquetas son del flujo; en el resto, del archivo
+    option = '-metadata:s:a:0' if ogg else '-metadata'
+    for name, value in tags.items():
+        cmd += [option, f'{name}={value}']
+    return cmd + [target]
+
+
+def _write_with_mutagen(path, ext, tags):
+    """Add `tags` in place to an Ogg or MP4 file with mutagen. Returns False if mutagen is missing."""
+    try:
+        import mutagen  # Opcional; yt-dlp la necesita ya para incrustar carátulas en Opus, Vorbis y M4A
+        from mutagen.mp4 import MP4, MP4FreeForm, AtomDataType
+    except ImportError:
+        return False
+    try:
+        if ext in MP4_EXTENSIONS:
+            # Átomos libres de iTunes; el resto de etiquetas (ilst) y la carátula quedan como estaban
+            audio = MP4(path)
+            if audio.tags is None:
+                audio.add_tags()
+            for name, value in tags.items():
+                audio.tags[MP4_FREEFORM + name] = [MP4FreeForm(value.encode('utf-8'), dataformat=AtomDataType.UTF8)]
+        else:
+            audio = mutagen.File(path)
+            if audio is None:
+                raise ValueError(f"{path} is not an Ogg file mutagen can read")
+            if audio.tags is None:
+                audio.add_tags()
+            for name, value in tags.items():
+                audio.tags[name] = [value]
+        audio.save()
+    except mutagen.MutagenError as e:
+        raise ValueError(str(e))
+    return True
+
+
+def write_tags(run, ffmpeg, path, tags):
+    """Add gain tags to a file in place without touching its audio. run(cmd) -> (returncode, stderr)."""
+    prefix, extension = os.path.splitext(path)
+    ext = extension.lstrip('.').lower()
+    if ext in UNTAGGABLE_EXTENSIONS:
+        logging.info(f"Gain tags are not supported in {path}")
+        return
+    if ext in OGG_EXTENSIONS + MP4_EXTENSIONS:
+        if _write_with_mutagen(path, ext, tags):
+            return
+        if ext in MP4_EXTENSIONS:
+            # Con ffmpeg las etiquetas libres de MP4 exigen use_metadata_tags, que pasa todas las demás a mdta
+            logging.warning(f"Gain tags in {path} need mutagen; left without them")
+            return
+    target = f'{prefix}.temp{extension}'
+    try:
+        returncode, stderr = run(tag_command(ffmpeg, path, tags, target))
+    except BaseException:
+        if os.path.exists(target):
+            os.remove(target)
+        raise
+    if returncode != 0:
+        if os.path.exists(target):
+            os.remove(target)
+        stderr = stderr.strip()
+        raise ValueError(stderr.splitlines()[-1] if stderr else f'ffmpeg exited with code {returncode}')
+    os.replace(target, path)
+
+
+def write_album_gain(run, ffmpeg, tracks, map_fn=map):
+    """Tag every track of an album ([(path, duration, loudness, true peak)]) with the album gain.
+
+    map_fn runs the writes, e.g. the map() of an executor. Returns the (path, error)
+    of the files that could not be tagged.
+    """
+    if not tracks:
+        return []
+    loudness, peak = album_loudness([(duration, i, tp) for _, duration, i, tp in tracks])
+
+    def tag(path):
+        try:
+            ext = os.path.splitext(path)[1].lstrip('.').lower()
+            write_tags(run, ffmpeg, path, gain_tags(ext, 'ALBUM', loudness, peak))
+            return None
+        except (ValueError, OSError) as e:
+            logging.warning(f"Album gain of {path} failed: {e}")
+            return path, str(e)
+
+    return [error for error in map_fn(tag, [path for path, _, _, _ in tracks]) if error]
@@ -0,0 +1,166 @@
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+
+# Clases de error de una pista
+NETWORK = 'network'
+THROTTLED = 'throttled'  # HTTP 429 / 403
+EXTRACTOR = 'extractor'
+FFMPEG = 'ffmpeg'
+PERMANENT = 'permanent'  # No se reintenta: vídeo privado, borrado, sin ffmpeg...
+
+NETWORK_ERRORS = {'TransportError', 'IncompleteRead', 'ConnectionError', 'TimeoutError', 'timeout', 'URLError',
+                  'SSLError', 'RemoteDisconnected', 'ContentTooShortError'}
+NETWORK_MESSAGES = ('timed out', 'connection reset', 'connection aborted', 'connection refused',
+                    'temporary failure in name resolution', 'getaddrinfo failed', 'remote end closed',
+                    'unable to download webpage', 'incomplete read')
+PERMANENT_ERRORS = {'UnsupportedError', 'GeoRestrictedError'}
+PERMANENT_MESSAGES = ('ffmpeg not found', 'ffprobe not found')
+
+
+class RetryPolicy:
+    """How often and how late a class of errors is retried: exponential backoff with jitter."""
+
+    def __init__(self, attempts, base, cap):
+        self.attempts = attempts
+        self.base = base
+        self.cap = cap
+
+    def delay(self, attempt):
+        """Seconds to wait before retry number `attempt` (0-based), or None once the attempts are used up."""
+        if attempt >= self.attempts:
+            return None
+        ceiling = min(self.cap, self.base * 2 ** attempt)
+        # La mitad fija y la otra mitad aleatoria, para que las pistas que fallan juntas no se reintenten juntas
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+RETRY_POLICIES = {
+    NETWORK: RetryPolicy(attempts=4, base=2, cap=60),
+    THROTTLED: RetryPolicy(attempts=5, base=30, cap=600),
+    EXTRACTOR: RetryPolicy(attempts=2, base=10, cap=60),
+    FFMPEG: RetryPolicy(attempts=1, base=2, cap=10),
+}
+
+
+def _error_chain(error):
+    """The error and the errors it wraps (yt-dlp keeps them in exc_info and cause)."""
+    seen = []
+    while error is not None and not any(error is e for e in seen):
+        seen.append(error)
+        exc_info = getattr(error, 'exc_info', None)
+        if isinstance(exc_info, tuple) and len(exc_info) > 1 and isinstance(exc_info[1], BaseException):
+            error = exc_info[1]
+        elif isinstance(getattr(error, 'cause', None), BaseException):
+            error = error.cause
+        else:
+            error = error.__cause__ or error.__context__
+    return seen
+
+
+def _type_names(error):
+    return {cls.__name__ for cls in type(error).__mro__}
+
+
+def _http_status(error):
+    # yt_dlp.networking.exceptions.HTTPError lleva status; urllib.error.HTTPError, code
+    for attr in ('status', 'code'):
+        status = getattr(error, attr, None)
+        if isinstance(status, int) and 100 <= status < 600:
+            return status
+    return None
+
+
+def classify_error(error):
+    """Error class of a failed track, from the exception yt-dlp or the audio pipeline raised."""
+    chain = _error_chain(error)
+    message = " ".join(str(e) for e in chain).lower()
+    if any(text in message for text in PERMANENT_MESSAGES):
+        return PERMANENT
+    for e in chain:
+        status = _http_status(e)
+        if status in (403, 429):
+            return THROTTLED
+        if status is not None and status >= 500:
+            return NETWORK
+    if 'http error 429' in message or 'http error 403' in message:
+        return THROTTLED
+    names = set().union(*(_type_names(e) for e in chain))
+    if names & PERMANENT_ERRORS:
+        return PERMANENT
+    if names & NETWORK_ERRORS or any(text in message for text in NETWORK_MESSAGES):
+        return NETWORK
+    if 'PostProcessingError' in names:
+        return FFMPEG
+    for e in chain:
+        if 'ExtractorError' in _type_names(e):
+            # expected: el sitio dice que el vídeo no está disponible; volver a pedirlo no cambia nada
+            return PERMANENT if getattr(e, 'expected', False) else EXTRACTOR
+    return PERMANENT
+
+
+def retry_delay(error_class, attempt):
+    """Seconds before the next attempt of a track that failed `attempt` times already, or None to give up."""
+    policy = RETRY_POLICIES.get(error_class)
+    return policy.delay(attempt) if policy else None
+
+
+class RetryScheduler:
+    """Runs callbacks after a delay on a single timer thread.
+
+    Tracks waiting for a retry sit in a heap here instead of keeping a worker
+    asleep; when their time comes the callback (usually a submit() to the
+    download pool) runs on the timer thread. cancel() drops every pending
+    callback.
+    """
+
+    def __init__(self, name='retry'):
+        self.name = name
+        self._heap = []
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = None
+
+    def schedule(self, delay, fn, *args):
+        with self._cond:
+            if self._closed:
+                return
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._order), fn, args))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._heap)
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    wait = self._heap[0][0] - time.monotonic()
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                if self._closed:
+                    return
+                _, _, fn, args = heapq.heappop(self._heap)
+            try:
+                fn(*args)
+            except Exception as e:
+                logging.error(f"Retry callback failed: {e}")
+
+    def cancel(self):
+        """Drop the pending callbacks and stop the timer thread."""
+        with self._cond:
+            self._closed = True
+            self._heap.clear()
+            self._cond.notify_all()
@@ -0,0 +1,148 @@
+import json
+import logging
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from sqlite_store import SQLiteStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS searches (
+    query TEXT PRIMARY KEY,
+    results TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS details (
+    url TEXT PRIMARY KEY,
+    details TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+"""
+# Vigencia de una entrada de la caché (segundos)
+CACHE_TTL = 24 * 3600
+# Entradas que se conservan de cada tabla; se descartan las usadas hace más tiempo
+MAX_SEARCHES = 200
+MAX_DETAILS = 2000
+# Resultados de cada búsqueda cuyos metadatos se piden en segundo plano
+PREFETCH_TOP = 5
+PREFETCH_WORKERS = 3
+PREFETCH_OPTS = {
+    'quiet': True,
+    'skip_download': True,
+    'noplaylist': True,
+}
+
+
+def normalize_query(query):
+    """Cache key of a search: Unicode-normalized, case-folded, with single spaces."""
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+
+def audio_details(info):
+    """The fields of a full extraction that the interface shows: duration, uploader and audio-only formats."""
+    formats = [{'format_id': f.get('format_id'), 'ext': f.get('ext'), 'acodec': f.get('acodec'),
+                'abr': f.get('abr'), 'asr': f.get('asr')}
+               for f in info.get('formats') or []
+               if f.get('acodec') not in (None, 'none') and f.get('vcodec') in (None, 'none')]
+    return {
+        'title': info.get('title'),
+        'duration': info.get('duration'),
+        'uploader': info.get('uploader') or info.get('channel'),
+        'audio_formats': formats,
+    }
+
+
+class SearchCache(SQLiteStore):
+    """On-disk LRU cache of search results and track details, with a TTL.
+
+    Searches are keyed by their normalized query and details by URL. Expired
+    entries are never returned, and each table keeps only its most recently
+    used rows.
+    """
+
+    def __init__(self, path, ttl=CACHE_TTL, max_searches=MAX_SEARCHES, max_details=MAX_DETAILS):
+        super().__init__(path, SCHEMA)
+        self.ttl = ttl
+        self.max_searches = max_searches
+        self.max_details = max_details
+
+    def _get(self, table, key_column, column, key):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                row = conn.execute(f"SELECT {column} FROM {table} WHERE {key_column} = ? AND created > ?",
+                                   (key, now - self.ttl)).fetchone()
+                if row:
+                    conn.execute(f"UPDATE {table} SET last_used = ? WHERE {key_column} = ?", (now, key))
+        return json.loads(row[0]) if row else None
+
+    def _put(self, table, key_column, column, key, value, limit):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(f"INSERT OR REPLACE INTO {table} ({key_column}, {column}, created, last_used) VALUES (?, ?, ?, ?)",
+                             (key, json.dumps(value, ensure_ascii=False), now, now))
+                conn.execute(f"DELETE FROM {table} WHERE created <= ?", (now - self.ttl,))
+                conn.execute(f"DELETE FROM {table} WHERE {key_column} NOT IN "
+                             f"(SELECT {key_column} FROM {table} ORDER BY last_used DESC LIMIT ?)", (limit,))
+
+    def get(self, query):
+        """Cached results of a search ([{title, url, is_playlist}]), or None."""
+        return self._get('searches', 'query', 'results', normalize_query(query))
+
+    def put(self, query, results):
+        self._put('searches', 'query', 'results', normalize_query(query), results, self.max_searches)
+
+    def get_details(self, url):
+        """Cached audio_details() of a track, or None."""
+        return self._get('details', 'url', 'details', url)
+
+    def put_details(self, url, details):
+        self._put('details', 'url', 'details', url, details, self.max_details)
+
+
+class DetailsPrefetcher:
+    """Fetches the details of search results in the background and stores them in the cache.
+
+    on_details(url, details) is called from a worker thread when a track has
+    been fetched; tracks already cached or in flight are not fetched again.
+    """
+
+    def __init__(self, cache, on_details=None, workers=PREFETCH_WORKERS):
+        self.cache = cache
+        self.on_details = on_details
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='prefetch')
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def prefetch(self, urls):
+        for url in urls:
+            with self._lock:
+                if url in self._pending:
+                    continue
+                self._pending.add(url)
+            self._executor.submit(self._fetch, url)
+
+    def _fetch(self, url):
+        try:
+            details = self.cache.get_details(url)
+            if details is None:
+                import yt_dlp
+                with yt_dlp.YoutubeDL(PREFETCH_OPTS) as ydl:
+                    # Sin procesar: los formatos sin ordenar ni seleccionar bastan para listar los de audio
+                    details = audio_details(ydl.extract_info(url, download=False, process=False))
+                self.cache.put_details(url, details)
+            if self.on_details:
+                self.on_details(url, details)
+        except Exception as e:
+            logging.debug(f"Prefetch of {url} failed: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(url)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,92 @@
+import itertools
+import threading
+
+SEARCH_OPTS = {
+    'quiet': True,
+    'extract_flat': True,
+    'force_generic_extractor': False,
+}
+# Resultados por página si no se indica otra cosa
+DEFAULT_PAGE_SIZE = 10
+
+
+def search_result(entry):
+    """{title, url, is_playlist} of a flat search entry."""
+    url = entry.get('url', entry.get('webpage_url', ''))
+    return {
+        'title': entry.get('title', 'Sin título'),
+        'url': url,
+        'is_playlist': (entry.get('ie_key') or '').lower() in ['youtubeplaylist'] or 'playlist?list=' in url,
+    }
+
+
+class SearchSession:
+    """One search query, read page by page from a single lazy `ytsearchall:` listing.
+
+    next_page() delivers the next page_size results one at a time as they
+    arrive; calling it again continues where the last page stopped instead of
+    running the search again. Results already in the SearchCache are served
+    from it first, and every page extends the cached list.
+    """
+
+    def __init__(self, query, cache=None, page_size=DEFAULT_PAGE_SIZE):
+        self.query = query
+        self.cache = cache
+        self.page_size = page_size
+        self.results = []
+        self.exhausted = False
+        self._cached = (cache.get(query) if cache else None) or []
+        self._entries = None
+        self._ydl = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def next_page(self, on_result=None):
+        """Fetch up to page_size more results, calling on_result(result) for each one. Returns the new results."""
+        with self._lock:
+            page = []
+            while len(page) < self.page_size and not self._closed:
+                result = self._next_result()
+                if result is None:
+                    self.exhausted = True
+                    break
+                self.results.append(result)
+                page.append(result)
+                if on_result:
+                    on_result(result)
+            if self.cache and len(self.results) > len(self._cached):
+                self.cache.put(self.query, self.results)
+                self._cached = list(self.results)
+            if self._closed:
+                self._close_ydl()
+            return page
+
+    def _next_result(self):
+        index = len(self.results)
+        if index < len(self._cached):
+            return self._cached[index]
+        if self._entries is None:
+            import yt_dlp
+            self._ydl = yt_dlp.YoutubeDL(SEARCH_OPTS)
+            # Sin procesar, las entradas son un generador: cada página de la búsqueda se pide al recorrerlo
+            info = self._ydl.extract_info(f"ytsearchall:{self.query}", download=False, process=False)
+            # Saltar los resultados que ya se sirvieron desde la caché
+            self._entries = itertools.islice(iter(info.get('entries') or []), index, None)
+        for entry in self._entries:
+            if entry:
+                return search_result(entry)
+        return None
+
+    def close(self):
+        """Stop the session. A page being fetched stops after its current result."""
+        self._closed = True
+        if self._lock.acquire(blocking=False):
+            try:
+                self._close_ydl()
+            finally:
+                self._lock.release()
+
+    def _close_ydl(self):
+        if self._ydl is not None:
+            self._ydl.close()
+            self._ydl = None
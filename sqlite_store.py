@@ -0,0 +1,41 @@
+import sqlite3
+import threading
+
+
+class SQLiteStore:
+    """Base of the SQLite files of the application: one connection, opened on first use and shared by the threads.
+
+    Subclasses run their queries holding `_lock`. Once close() has been called
+    the connection is not opened again.
+    """
+
+    def __init__(self, path, schema, pragmas=("journal_mode=WAL",)):
+        self.path = path
+        self._schema = schema
+        self._pragmas = pragmas
+        self._conn = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        """The shared connection; call with `_lock` held."""
+        if self._conn is None:
+            if self._closed:
+                raise sqlite3.ProgrammingError(f"{self.path} is closed")
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            for pragma in self._pragmas:
+                conn.execute(f"PRAGMA {pragma}")
+            conn.executescript(self._schema)
+            self._migrate(conn)
+            self._conn = conn
+        return self._conn
+
+    def _migrate(self, conn):
+        """Bring a file written by an older version up to date. Runs once per connection."""
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,69 @@
+import os
+from types import SimpleNamespace
+from download_engine import DownloadJob, Track
+from job_control import JobControl
+from library_index import LibraryIndex
+
+KEY = ('Youtube', 'abc')
+
+
+def make_job(tmp_path, metadata):
+    library = LibraryIndex(str(tmp_path / 'library.db'))
+    settings = SimpleNamespace(output_hash='hash', metadata=metadata)
+    return DownloadJob(settings, JobControl(), library)
+
+
+def produce(job, folder):
+    """Index a track as if it had been downloaded into `folder`."""
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, 'Song.mp3')
+    with open(path, 'wb') as f:
+        f.write(b'audio')
+    job.library.record({'extractor_key': KEY[0], 'id': KEY[1], 'filepath': path, 'duration': 180}, 'hash')
+    return path
+
+
+def playlist_track(folder):
+    return Track('https://www.youtube.com/watch?v=abc', KEY, os.path.join(folder, '%(title)s.%(ext)s'),
+                 {'playlist_webpage_url': 'https://www.youtube.com/playlist?list=B'})
+
+
+def test_same_track_in_its_own_folder_is_skipped(tmp_path):
+    job = make_job(tmp_path, metadata=True)
+    first = str(tmp_path / 'A')
+    produce(job, first)
+    assert job._in_library(playlist_track(first))
+
+
+def test_same_track_in_two_playlists_is_copied(tmp_path):
+    job = make_job(tmp_path, metadata=False)
+    first, second = str(tmp_path / 'A'), str(tmp_path / 'B')
+    produce(job, first)
+    os.makedirs(second)  # La crea _playlist_template al resolver la lista
+    assert job._in_library(playlist_track(second))
+    copy = os.path.join(second, 'Song.mp3')
+    assert os.path.exists(copy)
+    assert job.library.lookup(KEY, 'hash', second) == copy
+    assert job.album_folders == {second}
+
+
+def test_same_track_in_two_playlists_is_downloaded_again_with_tags(tmp_path):
+    # Con metadatos el archivo lleva el álbum y el número de pista de la otra lista
+    job = make_job(tmp_path, metadata=True)
+    first, second = str(tmp_path / 'A'), str(tmp_path / 'B')
+    produce(job, first)
+    assert not job._in_library(playlist_track(second))
+    assert not os.path.exists(os.path.join(second, 'Song.mp3'))
+
+
+def test_copied_track_counts_in_the_album_gain_of_both_folders(tmp_path):
+    job = make_job(tmp_path, metadata=False)
+    first, second = str(tmp_path / 'A'), str(tmp_path / 'B')
+    original = produce(job, first)
+    measured = {'input_i': -14.0, 'input_lra': 5.0, 'input_tp': -1.0, 'input_thresh': -24.0, 'target_offset': 0.0}
+    job.library.record_loudness(KEY, measured, 'I=-14', 'hash')
+    os.makedirs(second)
+    assert job._in_library(playlist_track(second))
+    copy = os.path.join(second, 'Song.mp3')
+    assert job.library.folder_loudness(first) == [(original, 180, -14.0, -1.0)]
+    assert job.library.folder_loudness(second) == [(copy, 180, -14.0, -1.0)]
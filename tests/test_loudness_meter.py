@@ -0,0 +1,68 @@
+import math
+import struct
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from loudness_meter import SAMPLE_RATE, measure_wav
+
+
+def write_wav(path, samples):
+    """32-bit float WAV file of a (frames, channels) array, as ffmpeg writes it for the meter."""
+    samples = np.asarray(samples, dtype='<f4')
+    frames, channels = samples.shape
+    data = samples.tobytes()
+    fmt = struct.pack('<HHIIHH', 3, channels, SAMPLE_RATE, SAMPLE_RATE * channels * 4, channels * 4, 32)
+    with open(path, 'wb') as f:
+        f.write(b'RIFF' + struct.pack('<I', 4 + 8 + len(fmt) + 8 + len(data)) + b'WAVE')
+        f.write(b'fmt ' + struct.pack('<I', len(fmt)) + fmt)
+        f.write(b'data' + struct.pack('<I', len(data)) + data)
+    return str(path)
+
+
+def sine(dbfs, seconds, channels=2, frequency=997.0):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    wave = 10 ** (dbfs / 20) * np.sin(2 * np.pi * frequency * t)
+    return np.repeat(wave[:, None], channels, axis=1)
+
+
+def test_sine_at_minus_18_dbfs(tmp_path):
+    measured = measure_wav(write_wav(tmp_path / 'sine.wav', sine(-18, 20)))
+    assert measured['input_i'] == pytest.approx(-18.0, abs=0.1)
+    assert measured['input_tp'] == pytest.approx(-18.0, abs=0.2)
+    assert measured['input_lra'] == pytest.approx(0.0, abs=0.1)
+    assert measured['input_thresh'] == pytest.approx(-28.0, abs=0.1)
+
+
+@pytest.mark.parametrize('dbfs', [-23, -33])
+def test_ebu_tech_3341_constant_sine(tmp_path, dbfs):
+    # EBU Tech 3341, casos 1 y 2: seno de 1 kHz en estéreo, I = nivel del seno
+    measured = measure_wav(write_wav(tmp_path / 'sine.wav', sine(dbfs, 20, frequency=1000.0)))
+    assert measured['input_i'] == pytest.approx(dbfs, abs=0.1)
+
+
+def test_ebu_tech_3341_relative_gate(tmp_path):
+    # EBU Tech 3341, caso 3: los tramos a -36 dBFS quedan bajo la puerta relativa
+    signal = np.concatenate([sine(-36, 10, frequency=1000.0), sine(-23, 60, frequency=1000.0),
+                             sine(-36, 10, frequency=1000.0)])
+    measured = measure_wav(write_wav(tmp_path / 'gated.wav', signal))
+    assert measured['input_i'] == pytest.approx(-23.0, abs=0.1)
+
+
+def test_ebu_tech_3342_loudness_range(tmp_path):
+    # EBU Tech 3342, caso 1: 20 s a -20 dBFS y 20 s a -30 dBFS dan LRA = 10 LU
+    signal = np.concatenate([sine(-20, 20, frequency=1000.0), sine(-30, 20, frequency=1000.0)])
+    measured = measure_wav(write_wav(tmp_path / 'lra.wav', signal))
+    assert measured['input_lra'] == pytest.approx(10.0, abs=1.0)
+
+
+def test_mono_sine(tmp_path):
+    # Un solo canal a 0 dBFS: -3,01 LUFS
+    measured = measure_wav(write_wav(tmp_path / 'mono.wav', sine(0, 10, channels=1)))
+    assert measured['input_i'] == pytest.approx(-3.01, abs=0.1)
+
+
+def test_silence(tmp_path):
+    measured = measure_wav(write_wav(tmp_path / 'silence.wav', np.zeros((SAMPLE_RATE * 5, 2))))
+    assert measured['input_i'] == -math.inf
+    assert measured['input_tp'] == -math.inf
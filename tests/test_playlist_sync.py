@@ -0,0 +1,63 @@
+from playlist_sync import PlaylistSync, SYNC_KNOWN_RUN, newest_first
+
+
+class FakeLibrary:
+    def __init__(self, ids):
+        self.entries = {('Youtube', video_id): False for video_id in ids}
+
+    def playlist_entries(self, playlist_url):
+        return dict(self.entries)
+
+    def flag_removed_entries(self, playlist_url, seen_keys):
+        removed = [key for key in self.entries if key not in seen_keys]
+        for key in removed:
+            self.entries[key] = True
+        return len(removed)
+
+
+class FakePlaylist:
+    def __init__(self, ids, url='https://www.youtube.com/playlist?list=PL1', extractor_key='YoutubeTab'):
+        self.url = url
+        self.title = 'Test'
+        self.info = {'extractor_key': extractor_key, 'webpage_url': url, 'playlist_count': len(ids)}
+        self.ids = ids
+
+    def entries(self):
+        return enumerate(({'id': video_id, 'ie_key': 'Youtube', 'url': video_id} for video_id in self.ids), start=1)
+
+
+def selected(sync, playlist):
+    return [entry['id'] for _, entry in sync.select(playlist, playlist.entries())]
+
+
+def test_added_and_removed_with_same_count():
+    library = FakeLibrary(['a', 'b', 'c'])
+    playlist = FakePlaylist(['a', 'c', 'd'])
+    sync = PlaylistSync(library, flag_removed=True)
+    assert selected(sync, playlist) == ['d']
+    assert sync.removed == {'Test': 1}
+    assert library.entries[('Youtube', 'b')]
+
+
+def test_new_at_top_and_at_end():
+    known = [f'k{i}' for i in range(SYNC_KNOWN_RUN + 5)]
+    playlist = FakePlaylist(['top', *known, 'end'])
+    assert selected(PlaylistSync(FakeLibrary(known)), playlist) == ['top', 'end']
+
+
+def test_unchanged_playlist_selects_nothing():
+    ids = ['a', 'b', 'c']
+    assert selected(PlaylistSync(FakeLibrary(ids)), FakePlaylist(ids)) == []
+
+
+def test_newest_first_listing_stops_after_known_run():
+    known = [f'k{i}' for i in range(SYNC_KNOWN_RUN + 5)]
+    playlist = FakePlaylist(['new', *known, 'old'], url='https://www.youtube.com/@channel/videos')
+    assert newest_first(playlist)
+    assert selected(PlaylistSync(FakeLibrary(known)), playlist) == ['new']
+
+
+def test_only_channel_upload_tabs_are_newest_first():
+    assert not newest_first(FakePlaylist([], url='https://www.youtube.com/playlist?list=PL1'))
+    assert not newest_first(FakePlaylist([], url='https://www.youtube.com/@channel/videos', extractor_key='Generic'))
+    assert newest_first(FakePlaylist([], url='https://www.youtube.com/@channel/streams/'))
@@ -0,0 +1,48 @@
+import struct
+import pytest
+from replaygain import write_tags
+
+mp4 = pytest.importorskip("mutagen.mp4")
+
+
+def atom(name, payload=b''):
+    return struct.pack('>I4s', 8 + len(payload), name) + payload
+
+
+def full_atom(name, payload, flags=0):
+    return atom(name, struct.pack('>I', flags) + payload)
+
+
+def minimal_m4a():
+    """An empty audio-only MP4 with just the boxes mutagen needs to load and save it."""
+    stbl = atom(b'stbl', full_atom(b'stsd', struct.pack('>I', 0)) + full_atom(b'stts', struct.pack('>I', 0))
+                + full_atom(b'stsc', struct.pack('>I', 0)) + full_atom(b'stsz', struct.pack('>II', 0, 0))
+                + full_atom(b'stco', struct.pack('>I', 0)))
+    mdia = atom(b'mdia', full_atom(b'mdhd', struct.pack('>IIIIHH', 0, 0, 44100, 44100, 0, 0))
+                + full_atom(b'hdlr', struct.pack('>I4s', 0, b'soun') + b'\0' * 13)
+                + atom(b'minf', full_atom(b'smhd', b'\0' * 4) + stbl))
+    trak = atom(b'trak', full_atom(b'tkhd', b'\0' * 80, flags=1) + mdia)
+    moov = atom(b'moov', full_atom(b'mvhd', struct.pack('>IIII', 0, 0, 1000, 1000) + b'\0' * 80) + trak)
+    return atom(b'ftyp', b'M4A \0\0\0\0M4A mp42isom') + moov + atom(b'mdat', b'\0' * 16)
+
+
+def test_m4a_gain_tags_round_trip(tmp_path):
+    path = str(tmp_path / 'Song.m4a')
+    with open(path, 'wb') as f:
+        f.write(minimal_m4a())
+    audio = mp4.MP4(path)
+    audio.add_tags()
+    audio.tags['\xa9nam'] = ['Song']
+    audio.tags['\xa9ART'] = ['Artist']
+    audio.tags['\xa9alb'] = ['Album']
+    audio.save()
+
+    def run(cmd):
+        raise AssertionError("MP4 files must not be remuxed with ffmpeg")
+
+    write_tags(run, 'ffmpeg', path, {'REPLAYGAIN_TRACK_GAIN': '-3.00 dB', 'REPLAYGAIN_TRACK_PEAK': '0.891251'})
+
+    tags = mp4.MP4(path).tags
+    assert tags['----:com.apple.iTunes:REPLAYGAIN_TRACK_GAIN'] == [b'-3.00 dB']
+    assert tags['----:com.apple.iTunes:REPLAYGAIN_TRACK_PEAK'] == [b'0.891251']
+    assert (tags['\xa9nam'], tags['\xa9ART'], tags['\xa9alb']) == (['Song'], ['Artist'], ['Album'])
@@ -0,0 +1,56 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from ydl_pool import YoutubeDLPool
+from job_control import JobCancelled
+
+
+def default_transcode_workers():
+    return os.cpu_count() or 2
+
+
+class TranscodeStage:
+    """CPU stage of a job: runs the audio post-processors on files already downloaded.
+
+    The download workers hand every finished file to this stage and go back to
+    the network while ffmpeg runs here on its own pool, sized to the number of
+    cores by default. At most `backlog` files wait for a transcode slot; when the
+    backlog is full, submit() blocks the download worker until a slot frees up.
+    """
+
+    def __init__(self, settings, control, workers=0, backlog=0, library=None):
+        self.control = control
+        self.workers = workers or default_transcode_workers()
+        self.pool = YoutubeDLPool(settings, control, postprocess=True, library=library)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='transcode')
+        self._backlog = threading.BoundedSemaphore(backlog or self.workers * 2)
+
+    def submit(self, fn, *args):
+        """Queue fn(*args) on the transcode pool, waiting for room in the backlog."""
+        while not self._backlog.acquire(timeout=0.2):
+            self.control.checkpoint()
+        try:
+            self.control.checkpoint()
+            future = self.executor.submit(fn, *args)
+        except RuntimeError:
+            self._backlog.release()
+            if self.control.cancelled:
+                raise JobCancelled()  # cancel() cerró el pool entre el checkpoint y el submit
+            raise
+        except BaseException:
+            self._backlog.release()
+            raise
+        future.add_done_callback(lambda _: self._backlog.release())
+        return future
+
+    def post_process(self, info, output_template):
+        """Run every post_process step on a downloaded file and return the final info dict."""
+        return self.pool.get(output_template).post_process(info['filepath'], info)
+
+    def cancel(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        """Wait for the queued transcodes and release the YoutubeDL instances."""
+        self.executor.shutdown(wait=True)
+        self.pool.close()
@@ -20,16 +20,36 @@ TRANSLATIONS = {
         'download_queue_button': 'Descargar Cola',
         'destination': 'Destino: {}',
         'threads_label': 'Hilos',
+        'transcode_threads_label': 'Hilos de conversión',
+        'auto_threads_label': 'Hilos en modo auto (mín. – máx.)',
+        'search_page_size_label': 'Resultados por página',
+        'load_more_button': 'Cargar más',
+        'paste_songs_button': 'Pegar lista',
+        'import_songs_button': 'Importar archivo',
+        'import_file_types': 'Listas de URLs',
+        'status_importing': 'Importando {} URLs...',
+        'status_import_done': 'Importadas {} canciones. Total: {}',
+        'status_import_rejected': 'Descartadas: {} duplicadas, {} listas, {} con error',
+        'error_no_urls': 'No se encontraron URLs',
+        'retry_failed_button': 'Reintentar fallidas',
+        'copied_tracks_note': '{} pistas copiadas sin recodificar, {} convertidas',
+        'resume_title': 'Descarga interrumpida',
+        'resume_prompt': 'Una descarga anterior no terminó ({} pistas completadas, {} pendientes). ¿Quieres reanudarla?',
         'status_waiting_search': 'Esperando búsqueda...',
         'songs_label': 'Agregar Canciones',
         'add_button': 'Agregar',
         'download_button': 'Descargar',
         'pause_button': 'Pausar',
         'cancel_button': 'Cancelar',
+        'resume_button': 'Reanudar',
+        'status_paused': 'En pausa',
         'status_waiting_songs': 'Esperando canciones...',
         'playlist_label': 'Descargar Lista de Reproducción',
         'download_playlist_button': 'Descargar Lista',
         'status_waiting_playlist': 'Esperando lista de reproducción...',
+        'playlist_sync': 'Sincronizar (solo nuevas)',
+        'sync_flag_removed': 'Marcar eliminadas',
+        'sync_removed_entries': '{} entradas ya no están en "{}"',
         'audio_quality_label': 'Calidad de Audio',
         'codec_label': 'Códec',
         'bitrate_label': 'Tasa de Bits (kbps)',
@@ -47,6 +67,9 @@ TRANSLATIONS = {
         'lufs_tp_label': 'Pico Verdadero LUFS',
         'progress_title': 'Progreso de Descarga',
         'progress_status': 'Estado: Iniciando...',
+        'status_downloading': 'Descargando...',
+        'status_downloading_multiple': 'Descargando {} de {} videos...',
+        'status_album_gain': 'Escribiendo la ganancia de álbum...',
         'progress_video': 'Progreso del Video',
         'progress_global': 'Progreso Global',
         'success_title': 'Éxito',
@@ -110,16 +133,36 @@ TRANSLATIONS = {
         'download_queue_button': 'Download Queue',
         'destination': 'Destination: {}',
         'threads_label': 'Threads',
+        'transcode_threads_label': 'Transcode threads',
+        'auto_threads_label': 'Threads in auto mode (min – max)',
+        'search_page_size_label': 'Results per page',
+        'load_more_button': 'Load more',
+        'paste_songs_button': 'Paste list',
+        'import_songs_button': 'Import file',
+        'import_file_types': 'URL lists',
+        'status_importing': 'Importing {} URLs...',
+        'status_import_done': 'Imported {} songs. Total: {}',
+        'status_import_rejected': 'Skipped: {} duplicates, {} playlists, {} failed',
+        'error_no_urls': 'No URLs found',
+        'retry_failed_button': 'Retry failed',
+        'copied_tracks_note': '{} tracks copied without re-encoding, {} transcoded',
+        'resume_title': 'Interrupted download',
+        'resume_prompt': 'A previous download did not finish ({} tracks completed, {} pending). Do you want to resume it?',
         'status_waiting_search': 'Waiting for search...',
         'songs_label': 'Add Songs',
         'add_button': 'Add',
         'download_button': 'Download',
         'pause_button': 'Pause',
         'cancel_button': 'Cancel',
+        'resume_button': 'Resume',
+        'status_paused': 'Paused',
         'status_waiting_songs': 'Waiting for songs...',
         'playlist_label': 'Download Playlist',
         'download_playlist_button': 'Download Playlist',
         'status_waiting_playlist': 'Waiting for playlist...',
+        'playlist_sync': 'Sync (new only)',
+        'sync_flag_removed': 'Flag removed',
+        'sync_removed_entries': '{} entries are no longer in "{}"',
         'audio_quality_label': 'Audio Quality',
         'codec_label': 'Codec',
         'bitrate_label': 'Bitrate (kbps)',
@@ -137,6 +180,9 @@ TRANSLATIONS = {
         'lufs_tp_label': 'True Peak LUFS',
         'progress_title': 'Download Progress',
         'progress_status': 'Status: Starting...',
+        'status_downloading': 'Downloading...',
+        'status_downloading_multiple': 'Downloading {} of {} videos...',
+        'status_album_gain': 'Writing album gain...',
         'progress_video': 'Video Progress',
         'progress_global': 'Global Progress',
         'success_title': 'Success',
@@ -6,6 +6,7 @@ from ttkbootstrap.scrolled import ScrolledFrame
 from translations import TRANSLATIONS
 from download_manager import download_search_songs, start_songs_download, start_playlist_download
 import logging
+import os
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -67,10 +68,22 @@ def create_songs_tab(app):
     app.add_button.pack(pady=10, anchor="center")
     app.widget_translation_keys[str(id(app.add_button))] = 'add_button'
 
-    remove_button = ttk.Button(songs_tab, text=TRANSLATIONS[lang]['remove_button'], command=app.remove_song, bootstyle=SECONDARY)
-    remove_button.pack(pady=10, anchor="center")
+    songs_edit_frame = tk.Frame(songs_tab, bg=app.style.colors.bg)
+    songs_edit_frame.pack(pady=10, anchor="center")
+
+    remove_button = ttk.Button(songs_edit_frame, text=TRANSLATIONS[lang]['remove_button'], command=app.remove_song, bootstyle=SECONDARY)
+    remove_button.pack(side='left', padx=5)
     app.widget_translation_keys[str(id(remove_button))] = 'remove_button'
 
+    # Importación masiva: lista pegada o archivo txt/csv/m3u
+    app.paste_songs_button = ttk.Button(songs_edit_frame, text=TRANSLATIONS[lang]['paste_songs_button'], command=app.import_songs_from_clipboard, bootstyle=SECONDARY)
+    app.paste_songs_button.pack(side='left', padx=5)
+    app.widget_translation_keys[str(id(app.paste_songs_button))] = 'paste_songs_button'
+
+    app.import_songs_button = ttk.Button(songs_edit_frame, text=TRANSLATIONS[lang]['import_songs_button'], command=app.import_songs_from_file, bootstyle=SECONDARY)
+    app.import_songs_button.pack(side='left', padx=5)
+    app.widget_translation_keys[str(id(app.import_songs_button))] = 'import_songs_button'
+
     app.song_listbox = tk.Listbox(songs_tab, width=60, height=10, font=('Segoe UI', 10), bg='#FFFFFF', relief='flat', borderwidth=1)
     app.song_listbox.pack(pady=10, anchor="center")
 
@@ -109,6 +122,18 @@ def create_playlist_tab(app):
     
     ttk.Entry(playlist_tab, textvariable=app.playlist_url_var, width=60, bootstyle=SECONDARY).pack(pady=10, anchor="center")
 
+    # Sincronización incremental
+    sync_frame = tk.Frame(playlist_tab, bg=app.style.colors.bg)
+    sync_frame.pack(pady=5, anchor="center")
+    playlist_sync_check = ttk.Checkbutton(sync_frame, text=TRANSLATIONS[lang]['playlist_sync'],
+                                          variable=app.playlist_sync_var, bootstyle=INFO)
+    playlist_sync_check.pack(side='left', padx=5)
+    app.widget_translation_keys[str(id(playlist_sync_check))] = 'playlist_sync'
+    sync_flag_removed_check = ttk.Checkbutton(sync_frame, text=TRANSLATIONS[lang]['sync_flag_removed'],
+                                              variable=app.sync_flag_removed_var, bootstyle=INFO)
+    sync_flag_removed_check.pack(side='left', padx=5)
+    app.widget_translation_keys[str(id(sync_flag_removed_check))] = 'sync_flag_removed'
+
     # Visualización estática de la carpeta de destino
     create_destination_display(playlist_tab, app, editable=False)
 
@@ -244,7 +269,7 @@ def create_audio_options_tab(app):
     normalization_label.pack(side='left', padx=5)
     app.widget_translation_keys[str(id(normalization_label))] = 'normalization_label'
     normalization_combobox = ttk.Combobox(normalization_frame, textvariable=app.normalization_var, 
-                                         values=["off", "lufs_14", "lufs_23", "custom"], state='readonly', width=12, bootstyle=SECONDARY)
+                                         values=["off", "lufs_14", "lufs_23", "custom", "replaygain"], state='readonly', width=12, bootstyle=SECONDARY)
     normalization_combobox.pack(side='left', padx=5)
     logging.debug(f"Added normalization_label and normalization_combobox")
 
@@ -377,9 +402,41 @@ def create_options_tab(app):
     threads_label.pack(side='left', padx=5)
     app.widget_translation_keys[str(id(threads_label))] = 'threads_label'
     threads_combobox = ttk.Combobox(threads_frame, textvariable=app.threads_var, 
-                                   values=[str(i) for i in range(1, 9)], width=5, state='readonly', bootstyle=SECONDARY)
+                                   values=["auto"] + [str(i) for i in range(1, 9)], width=5, state='readonly', bootstyle=SECONDARY)
     threads_combobox.pack(side='left', padx=5)
 
+    transcode_threads_label = ttk.Label(threads_frame, text=TRANSLATIONS[lang]['transcode_threads_label'])
+    transcode_threads_label.pack(side='left', padx=20)
+    app.widget_translation_keys[str(id(transcode_threads_label))] = 'transcode_threads_label'
+    transcode_threads_combobox = ttk.Combobox(threads_frame, textvariable=app.transcode_threads_var,
+                                             values=["auto"] + [str(i) for i in range(1, (os.cpu_count() or 2) + 1)],
+                                             width=5, state='readonly', bootstyle=SECONDARY)
+    transcode_threads_combobox.pack(side='left', padx=5)
+
+    # Límites del modo automático de descargas
+    auto_threads_frame = tk.Frame(main_frame, bg=app.style.colors.bg)
+    auto_threads_frame.pack(fill='x', pady=5)
+    auto_threads_label = ttk.Label(auto_threads_frame, text=TRANSLATIONS[lang]['auto_threads_label'])
+    auto_threads_label.pack(side='left', padx=5)
+    app.widget_translation_keys[str(id(auto_threads_label))] = 'auto_threads_label'
+    threads_min_combobox = ttk.Combobox(auto_threads_frame, textvariable=app.threads_min_var,
+                                        values=[str(i) for i in range(1, 17)], width=5, state='readonly', bootstyle=SECONDARY)
+    threads_min_combobox.pack(side='left', padx=5)
+    ttk.Label(auto_threads_frame, text="–").pack(side='left')
+    threads_max_combobox = ttk.Combobox(auto_threads_frame, textvariable=app.threads_max_var,
+                                        values=[str(i) for i in range(1, 17)], width=5, state='readonly', bootstyle=SECONDARY)
+    threads_max_combobox.pack(side='left', padx=5)
+
+    # Search frame
+    search_frame = tk.Frame(main_frame, bg=app.style.colors.bg)
+    search_frame.pack(fill='x', pady=5)
+    search_page_size_label = ttk.Label(search_frame, text=TRANSLATIONS[lang]['search_page_size_label'])
+    search_page_size_label.pack(side='left', padx=5)
+    app.widget_translation_keys[str(id(search_page_size_label))] = 'search_page_size_label'
+    search_page_size_combobox = ttk.Combobox(search_frame, textvariable=app.search_page_size_var,
+                                             values=["5", "10", "20", "50", "100"], width=5, state='readonly', bootstyle=SECONDARY)
+    search_page_size_combobox.pack(side='left', padx=5)
+
     # Separator
     ttk.Separator(main_frame, orient='horizontal').pack(fill='x', pady=10)
 
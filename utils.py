@@ -1,6 +1,17 @@
+import os
 import re
 
+# Directorio persistente de configuración, compartido por la interfaz y la línea de comandos.
+# EASYTUNRMUSIC_CONFIG_DIR lo sustituye (p. ej. el benchmark de arranque usa uno temporal)
+CONFIG_DIR = os.environ.get("EASYTUNRMUSIC_CONFIG_DIR") or os.path.join(os.path.expanduser("~"), ".easytunrmusic")
+
 def clean_folder_name(name):
     cleaned = re.sub(r'[<>:"/\\|?*]', '_', name)
     cleaned = re.sub(r'[\x00-\x1F\x7F]', '', cleaned).strip()
-    return cleaned if cleaned else "Lista_Sin_Nombre"
\ No newline at end of file
+    return cleaned if cleaned else "Lista_Sin_Nombre"
+
+def format_duration(seconds):
+    """m:ss, or h:mm:ss for an hour or more."""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
@@ -0,0 +1,53 @@
+import threading
+import yt_dlp
+from audio_pipeline import add_audio_postprocessors
+
+
+class YoutubeDLPool:
+    """Long-lived YoutubeDL instances shared by the tracks of a job.
+
+    Each worker thread lazily creates its own instance per output template and
+    reuses it for every track it downloads, keeping the extractors, the cookie
+    jar and the HTTP connections alive. YoutubeDL is not thread-safe, so
+    instances are never shared between threads. With postprocess=True the
+    instances carry the audio post-processors instead of downloading, and the
+    library index, if given, caches their loudness measurements.
+    """
+
+    def __init__(self, settings, control, progress_hooks=(), postprocess=False, library=None):
+        self.settings = settings
+        self.control = control
+        self.progress_hooks = list(progress_hooks)
+        self.postprocess = postprocess
+        self.library = library
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._instances = []
+
+    def get(self, output_template):
+        """Return the calling thread's YoutubeDL for the given output template."""
+        instances = getattr(self._local, 'instances', None)
+        if instances is None:
+            instances = self._local.instances = {}
+        ydl = instances.get(output_template)
+        if ydl is None:
+            ydl = instances[output_template] = self._create(output_template)
+            with self._lock:
+                self._instances.append(ydl)
+        return ydl
+
+    def _create(self, output_template):
+        ydl_opts = self.settings.ydl_options(output_template)
+        ydl_opts['progress_hooks'] = [*self.progress_hooks, self.control.progress_hook]
+        ydl = yt_dlp.YoutubeDL(ydl_opts)
+        if self.postprocess and self.settings.audio_pipeline:
+            add_audio_postprocessors(ydl, self.settings.audio_pipeline, self.settings.metadata, self.control,
+                                     self.library, self.settings.output_hash)
+        return ydl
+
+    def close(self):
+        """Close every instance created by the pool. Call once the workers have finished."""
+        with self._lock:
+            instances, self._instances = self._instances, []
+        for ydl in instances:
+            ydl.close()